@@ -0,0 +1,277 @@
+"""Archival of completed drafts.
+
+A league whose draft finished more than ARCHIVE_AFTER_DAYS ago has its players, pick
+log and draft config packed into one zlib-compressed BSON document in
+`league_archives`, and those rows are removed from the hot collections. The league
+and team documents stay, so members can still log in.
+
+Logging in to or reading from an archived league restores its rows for read-only
+viewing; writes to archived or restored leagues are rejected. A restored
+league is archived again once nobody has read it for ARCHIVE_RESTORE_HOURS (reads
+refresh its `last_read_at`, at most every ARCHIVE_READ_TOUCH_S).
+
+Each league's `archive_state` moves through
+    None -> archiving -> archived -> restoring -> restored -> archiving -> ...
+with every transition a compare-and-set, so several workers can run the job. A
+failed restore goes back to archived; one whose worker died is taken over once its
+`restoring_at` claim is ARCHIVE_RESTORE_TIMEOUT_S old.
+
+Run the job by hand or from cron with:
+
+    python -m backend.app.archive [--dry-run]
+
+or set ARCHIVE_INTERVAL_HOURS to run it inside the app.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import bson
+from fastapi import Depends, HTTPException
+from pymongo.errors import BulkWriteError
+
+from . import events
+from .auth import get_current_league
+from .db import config_col, get_db, leagues_col, picks_col, players_col
+from .queries import drafted_players
+from .rules import draft_complete
+from .singleflight import reads
+from .versions import get_archive_state, version_doc
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "14"))
+ARCHIVE_RESTORE_HOURS = float(os.getenv("ARCHIVE_RESTORE_HOURS", "24"))
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "0"))
+# A restore claimed longer ago than this is presumed dead and may be taken over
+ARCHIVE_RESTORE_TIMEOUT_S = float(os.getenv("ARCHIVE_RESTORE_TIMEOUT_S", "300"))
+
+# Reads of a restored league refresh its last_read_at no more often than this
+ARCHIVE_READ_TOUCH_S = float(os.getenv("ARCHIVE_READ_TOUCH_S", str(min(900.0, ARCHIVE_RESTORE_HOURS * 3600 / 4))))
+
+# Leave headroom under MongoDB's 16MB document limit
+MAX_ARCHIVE_BYTES = 15 * 1024 * 1024
+
+
+def archives_col():
+    return get_db()["league_archives"]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def _set_state(
+    league_name: str, expected: List[Optional[str]], state: str, claimed: Optional[Dict] = None, **fields
+) -> bool:
+    # `claimed` matches further states that may be taken over (e.g. an expired restore)
+    current = {"archive_state": {"$in": expected}}
+    query = {"_id": league_name, **({"$or": [current, claimed]} if claimed else current)}
+    result = await leagues_col().update_one(query, {"$set": {"archive_state": state, **fields}})
+    # The state is read along with the league version; don't let readers join a stale read
+    reads.forget(("version", league_name))
+    return result.modified_count == 1
+
+
+async def ensure_writable(league_name: str) -> None:
+    # Shares the league-version read that every poll of the league makes
+    if await get_archive_state(league_name):
+        raise HTTPException(status_code=409, detail="This league's draft is archived and read-only")
+
+
+async def archive_league(league_name: str) -> Optional[Dict]:
+    """Pack the league into its archive and drop its hot rows. Returns a summary, or None if skipped."""
+    ldoc = await leagues_col().find_one({"_id": league_name}, {"archive_state": 1})
+    if not ldoc:
+        return None
+    was_restored = ldoc.get("archive_state") == "restored"
+    if not await _set_state(league_name, [None, "restored"], "archiving"):
+        return None  # another worker has it, or it is already archived
+
+    try:
+        if was_restored and await archives_col().find_one({"_id": league_name}, {"_id": 1}):
+            # Restored leagues are read-only, so the existing archive is still exact
+            summary = {"league_name": league_name, "reused": True}
+        else:
+            cfg = await config_col().find_one({"_id": f"config:{league_name}"})
+            players = [doc async for doc in players_col().find({"league_name": league_name})]
+            picks = [doc async for doc in picks_col().find({"league_name": league_name}).sort("overall", 1)]
+            payload = zlib.compress(bson.encode({"config": cfg, "players": players, "picks": picks}), 9)
+            if len(payload) > MAX_ARCHIVE_BYTES:
+                raise ValueError(f"archive is {len(payload)} bytes compressed")
+            await archives_col().replace_one(
+                {"_id": league_name},
+                {
+                    "_id": league_name,
+                    "archived_at": _now(),
+                    "encoding": "bson+zlib",
+                    "players": len(players),
+                    "picks": len(picks),
+                    "payload": bson.Binary(payload),
+                },
+                upsert=True,
+            )
+            summary = {"league_name": league_name, "players": len(players), "picks": len(picks), "bytes": len(payload)}
+    except Exception:
+        await _set_state(league_name, ["archiving"], "restored" if was_restored else None)
+        raise
+
+    await asyncio.gather(
+        players_col().delete_many({"league_name": league_name}),
+        picks_col().delete_many({"league_name": league_name}),
+        config_col().delete_one({"_id": f"config:{league_name}"}),
+    )
+    await _set_state(league_name, ["archiving"], "archived", archived_at=_now())
+    await events.notify(league_name, "archived")
+    return summary
+
+
+def _expired_restore() -> Dict:
+    return {"archive_state": "restoring", "restoring_at": {"$lte": _now() - timedelta(seconds=ARCHIVE_RESTORE_TIMEOUT_S)}}
+
+
+async def restore_league(league_name: str) -> bool:
+    """Bring an archived league's rows back for read-only viewing. Returns True if this call restored it."""
+    # Millisecond precision, so the claim compares equal once stored
+    now = _now()
+    claimed_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    if not await _set_state(league_name, ["archived"], "restoring", claimed=_expired_restore(), restoring_at=claimed_at):
+        return False
+    # Later transitions only apply while this call's claim still stands
+    ours = {"archive_state": "restoring", "restoring_at": claimed_at}
+    try:
+        archive = await archives_col().find_one({"_id": league_name})
+        if not archive:
+            logger.error("League %s is marked archived but has no archive document", league_name)
+            await _set_state(league_name, [], "restored", claimed=ours, restored_at=_now(), last_read_at=_now())
+            return False
+        data = bson.decode(zlib.decompress(archive["payload"]))
+        for col, docs in ((players_col(), data.get("players") or []), (picks_col(), data.get("picks") or [])):
+            if docs:
+                try:
+                    await col.insert_many(docs, ordered=False)
+                except BulkWriteError:
+                    pass  # rows left over from an interrupted archive or restore
+        if data.get("config"):
+            await config_col().replace_one({"_id": data["config"]["_id"]}, data["config"], upsert=True)
+    except BaseException:
+        # Leave it archived for the next reader to retry; rows already inserted are skipped then
+        await _set_state(league_name, [], "archived", claimed=ours)
+        raise
+    await _set_state(league_name, [], "restored", claimed=ours, restored_at=_now(), last_read_at=_now())
+    await events.notify(league_name, "restored")
+    return True
+
+
+async def restored_version_doc(league_name: str) -> Dict:
+    """The league's version document, after restoring the league if it is archived.
+
+    Routes that read the league version anyway use this, so the archive check rides
+    on the same (coalesced) read.
+    """
+    doc = await version_doc(league_name)
+    if doc.get("archive_state") in ("archived", "restoring"):
+        # restore_league takes over a "restoring" claim only once it has expired
+        await reads.do(("restore", league_name), lambda: restore_league(league_name))
+        doc = await version_doc(league_name)
+    elif doc.get("archive_state") == "restored":
+        await _touch(league_name, doc.get("last_read_at"))
+    return doc
+
+
+async def _touch(league_name: str, last_read_at: Optional[datetime]) -> None:
+    # Keep a restored league that is still being read from being archived again
+    stale = _now() - timedelta(seconds=ARCHIVE_READ_TOUCH_S)
+    if last_read_at is not None and _aware(last_read_at) > stale:
+        return
+    await leagues_col().update_one(
+        {"_id": league_name, "archive_state": "restored", "$or": [{"last_read_at": None}, {"last_read_at": {"$lte": stale}}]},
+        {"$set": {"last_read_at": _now()}},
+    )
+
+
+async def ensure_restored(league_name: str) -> None:
+    """Restore the league first if it is archived; cheap for every other league."""
+    await restored_version_doc(league_name)
+
+
+async def get_readable_league(league_name: str = Depends(get_current_league)) -> str:
+    # get_current_league for read routes: an archived league is restored before it is read
+    await ensure_restored(league_name)
+    return league_name
+
+
+async def archive_completed_leagues(dry_run: bool = False) -> List[str]:
+    """Archive finished drafts past ARCHIVE_AFTER_DAYS and idle restored leagues. Returns the leagues archived."""
+    now = _now()
+    due: List[str] = []
+    async for cfg in config_col().find({"draft_started": True}):
+        league_name = cfg["league_name"]
+        if not draft_complete(cfg):
+            continue
+        last = await drafted_players(league_name, 1)
+        last_at = _aware(last[0].drafted_at) if last else None
+        if last_at is None or now - last_at >= timedelta(days=ARCHIVE_AFTER_DAYS):
+            due.append(league_name)
+    idle_since = now - timedelta(hours=ARCHIVE_RESTORE_HOURS)
+    idle = {
+        "archive_state": "restored",
+        # Leagues restored before reads were tracked fall back to their restore time
+        "$or": [
+            {"last_read_at": {"$lte": idle_since}},
+            {"last_read_at": None, "restored_at": {"$lte": idle_since}},
+        ],
+    }
+    async for ldoc in leagues_col().find(idle, {"_id": 1}):
+        if ldoc["_id"] not in due:
+            due.append(ldoc["_id"])
+
+    archived: List[str] = []
+    for league_name in due:
+        if dry_run:
+            archived.append(league_name)
+            continue
+        try:
+            summary = await archive_league(league_name)
+        except Exception:
+            logger.exception("Archiving %s failed", league_name)
+            continue
+        if summary:
+            logger.info("Archived %s", summary)
+            archived.append(league_name)
+    return archived
+
+
+async def run_periodically() -> None:
+    while True:
+        try:
+            await archive_completed_leagues()
+        except Exception:
+            logger.exception("Archive run failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
+
+
+async def _main(dry_run: bool) -> int:
+    leagues = await archive_completed_leagues(dry_run)
+    verb = "Would archive" if dry_run else "Archived"
+    print(f"{verb} {len(leagues)} league(s){': ' + ', '.join(leagues) if leagues else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Archive completed drafts out of the hot collections")
+    parser.add_argument("--dry-run", action="store_true", help="list the leagues that would be archived")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.dry_run)))
@@ -1,8 +1,11 @@
 import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from dotenv import load_dotenv
@@ -14,8 +17,11 @@ load_dotenv(dotenv_path=_dotenv_path)
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 7
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
 
 security = HTTPBearer()
+# Streaming endpoints are opened with EventSource, which cannot set headers
+optional_security = HTTPBearer(auto_error=False)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -26,34 +32,74 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_team(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        team_name: str = payload.get("team_name")
-        if team_name is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return team_name
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+@dataclass(frozen=True)
+class Principal:
+    team_name: str
+    league_name: str
+    is_admin: bool = False
 
 
-async def get_current_league(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        league_name: str = payload.get("league_name")
-        if league_name is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return league_name
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+# Already-verified tokens -> (principal, exp). Tokens are immutable, so a hit only
+# has to check that the token has not expired since it was verified.
+_token_cache: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+
+
+def _unauthorized(detail: str = "Invalid token") -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
 
 
-async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)) -> bool:
-    token = credentials.credentials
+def verify_token(token: str) -> Principal:
+    now = time.time()
+    cached = _token_cache.get(token)
+    if cached is not None:
+        principal, exp = cached
+        if exp > now:
+            _token_cache.move_to_end(token)
+            return principal
+        del _token_cache[token]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return bool(payload.get("is_admin", False))
     except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        raise _unauthorized()
+    team_name = payload.get("team_name")
+    league_name = payload.get("league_name")
+    if team_name is None or league_name is None:
+        raise _unauthorized()
+    principal = Principal(team_name=team_name, league_name=league_name, is_admin=bool(payload.get("is_admin", False)))
+
+    exp = payload.get("exp")
+    if exp is not None:
+        _token_cache[token] = (principal, float(exp))
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return principal
+
+
+async def get_principal(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Principal:
+    return verify_token(credentials.credentials)
+
+
+# FastAPI resolves get_principal once per request, so routes that depend on several
+# of these still verify the token only once.
+async def get_current_team(principal: Principal = Depends(get_principal)) -> str:
+    return principal.team_name
+
+
+async def get_current_league(principal: Principal = Depends(get_principal)) -> str:
+    return principal.league_name
+
+
+async def get_current_admin(principal: Principal = Depends(get_principal)) -> bool:
+    return principal.is_admin
+
+
+async def get_stream_league(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> str:
+    # Accept either the usual bearer header or a ?token= query parameter
+    raw = credentials.credentials if credentials else token
+    if not raw:
+        raise _unauthorized("Not authenticated")
+    return verify_token(raw).league_name
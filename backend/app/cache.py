@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from .singleflight import reads
+
+
+class VersionedCache:
+    """Bounded LRU of values tagged with the league version they were built at.
+
+    A lookup only hits when the stored version matches the caller's, so a bump of
+    the league version invalidates every entry for that league without any
+    explicit eviction.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, version: int, value: Any) -> None:
+        current = self._entries.get(key)
+        # Never let a slow reader overwrite a newer entry with stale data
+        if current is not None and current[0] > version:
+            return
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_build(self, key: Hashable, version: int, build: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the entry for `version`, building it once however many callers miss together."""
+        value = self.get(key, version)
+        if value is None:
+            value = await reads.do(("cache", id(self), key, version), build)
+            self.set(key, version, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
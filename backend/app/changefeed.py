@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+from .db import get_db
+from .events import broker, forget_stale_reads
+from .scheduler import pick_clock
+
+logger = logging.getLogger(__name__)
+
+# Resume tokens are stored per listener so a restarted worker continues where it
+# left off instead of missing events or replaying the whole history. Workers sharing a
+# CHANGEFEED_ID (e.g. `uvicorn --workers N` on one host) each lease a numbered slot
+# under it; a restarted worker takes over a slot whose lease has lapsed, token and all.
+CHANGEFEED_ID = os.getenv("CHANGEFEED_ID", socket.gethostname())
+CHANGEFEED_LEASE_S = float(os.getenv("CHANGEFEED_LEASE_S", "30"))
+RETRY_SECONDS = 1.0
+# Mongo error code for a resume token that has fallen off the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# Every mutation calls events.notify, which bumps `leagues.version` and stores the
+# event in `last_event` in the same write. Watching only those updates gives one
+# ordered stream of complete events per league, including deletes and bulk uploads
+# that would be ambiguous or thousands of entries long on `players` itself.
+_PIPELINE = [
+    {
+        "$match": {
+            "operationType": "update",
+            "updateDescription.updatedFields.last_event": {"$exists": True},
+        }
+    },
+    {"$project": {"documentKey": 1, "updateDescription.updatedFields": 1}},
+]
+
+
+class ChangeFeed:
+    def __init__(self, listener_id: str = CHANGEFEED_ID, lease_seconds: float = CHANGEFEED_LEASE_S):
+        self._listener_id = listener_id
+        self._lease = timedelta(seconds=lease_seconds)
+        # Identifies this process as the holder of its slot's lease
+        self._owner = str(ObjectId())
+        self._slot: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._renew_task: Optional[asyncio.Task] = None
+
+    def _state_col(self):
+        return get_db()["changefeed_state"]
+
+    async def _claim_slot(self) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Lease the first free slot under the listener id; returns it and its stored resume token."""
+        n = 0
+        while True:
+            slot = f"{self._listener_id}:{n}"
+            now = datetime.now(timezone.utc)
+            try:
+                doc = await self._state_col().find_one_and_update(
+                    {"_id": slot, "$or": [{"owner": self._owner}, {"lease_until": {"$lte": now}}]},
+                    {"$set": {"owner": self._owner, "lease_until": now + self._lease}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return slot, doc.get("resume_token")
+            except DuplicateKeyError:
+                n += 1  # leased by a live worker
+
+    async def _renew(self) -> None:
+        while True:
+            await asyncio.sleep(self._lease.total_seconds() / 3)
+            try:
+                result = await self._state_col().update_one(
+                    {"_id": self._slot, "owner": self._owner},
+                    {"$set": {"lease_until": datetime.now(timezone.utc) + self._lease}},
+                )
+                if result.matched_count == 0:
+                    # Lost the slot while unable to renew; carry on under a free one
+                    self._slot, _ = await self._claim_slot()
+            except PyMongoError as exc:
+                logger.warning("Change stream lease renewal failed: %s", exc)
+
+    async def _save_token(self, token: Dict[str, Any]) -> None:
+        await self._state_col().update_one({"_id": self._slot, "owner": self._owner}, {"$set": {"resume_token": token}})
+
+    def _dispatch(self, change: Dict[str, Any]) -> None:
+        fields = change["updateDescription"]["updatedFields"]
+        event = dict(fields["last_event"])
+        event["version"] = fields.get("version", event.get("version"))
+        league_name = change["documentKey"]["_id"]
+        forget_stale_reads(league_name)
+        broker.publish(league_name, event)
+        # Keep this worker's pick clock in step with clock changes made on other workers
+        if event.get("type") in ("start", "pick", "undo", "replay") and "current_pick_index" in event:
+            pick_clock.schedule(league_name, event["current_pick_index"], event.get("pick_deadline"))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self._slot, token = await self._claim_slot()
+                break
+            except PyMongoError as exc:
+                logger.warning("Change stream slot claim failed: %s", exc)
+                await asyncio.sleep(RETRY_SECONDS)
+        self._renew_task = asyncio.create_task(self._renew())
+        while True:
+            try:
+                async with get_db()["leagues"].watch(_PIPELINE, resume_after=token) as stream:
+                    async for change in stream:
+                        self._dispatch(change)
+                        token = stream.resume_token
+                        await self._save_token(token)
+            except OperationFailure as exc:
+                if exc.code == CHANGE_STREAM_HISTORY_LOST:
+                    logger.warning("Change stream resume token expired; restarting from now")
+                    token = None
+                    continue
+                logger.warning("Change stream failed: %s", exc)
+            except PyMongoError as exc:
+                logger.warning("Change stream interrupted: %s", exc)
+            await asyncio.sleep(RETRY_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._renew_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._renew_task = None
+        if self._slot is not None:
+            # Release the lease so the worker that replaces this one resumes from its token
+            try:
+                await self._state_col().update_one(
+                    {"_id": self._slot, "owner": self._owner}, {"$set": {"lease_until": datetime.now(timezone.utc)}}
+                )
+            except PyMongoError as exc:
+                logger.warning("Change stream lease release failed: %s", exc)
+            self._slot = None
+
+
+change_feed = ChangeFeed()
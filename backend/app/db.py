@@ -1,7 +1,10 @@
+import asyncio
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
+from .metrics import mongo_listener
+
 # Load env from backend/.env regardless of current working directory
 _dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
 load_dotenv(dotenv_path=_dotenv_path)
@@ -9,16 +12,58 @@ load_dotenv(dotenv_path=_dotenv_path)
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "fantasy_draft")
 
+# Connection pool tuning; see the pymongo MongoClient options of the same names
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0")) or None
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")) or None
+
 _client: AsyncIOMotorClient | None = None
 
 
-def get_client() -> AsyncIOMotorClient:
+def connect() -> AsyncIOMotorClient:
+    """Create the shared client. The app does this in its lifespan; scripts get it lazily."""
     global _client
     if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URL)
+        _client = AsyncIOMotorClient(
+            MONGO_URL,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            # Command monitoring feeds the per-collection counters served at /metrics
+            event_listeners=[mongo_listener],
+        )
     return _client
 
 
+def get_client() -> AsyncIOMotorClient:
+    return connect()
+
+
+async def ping() -> None:
+    """Round trip to the server; raises if it cannot be reached within the selection timeout."""
+    await get_db().command("ping")
+
+
+async def warmup() -> None:
+    # Open the first pooled connections before traffic arrives, so the first
+    # requests after a deploy don't pay for server selection and the handshake
+    client = connect()
+    await asyncio.gather(*(client[DB_NAME].command("ping") for _ in range(max(MONGO_MIN_POOL_SIZE, 1))))
+
+
+def close() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
 def get_db():
     return get_client()[DB_NAME]
 
@@ -37,3 +82,12 @@ def config_col():
 
 def leagues_col():
     return get_db()["leagues"]
+
+
+def picks_col():
+    return get_db()["picks"]
+
+
+def migrations_col():
+    # One marker document per data migration that has run against this database
+    return get_db()["migrations"]
@@ -0,0 +1,62 @@
+import json
+from typing import Any, Dict, List, Mapping, Sequence
+
+from fastapi import HTTPException
+
+# orjson is several times faster than the stdlib encoder on large lists of players.
+# It is optional; without it we fall back to compact stdlib JSON.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Optional too; only needed for ?format=msgpack
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+# Representations of player lists, selected with ?format=
+MEDIA_TYPES = {
+    "json": "application/json",
+    # {"id": [...], "name": [...], ...}: one array per PlayerOut field, no repeated keys
+    "columns": "application/json",
+    "msgpack": "application/msgpack",
+}
+
+PLAYER_FIELDS = ("id", "name", "position", "drafted_by", "rank", "projection", "vor", "value_rank")
+
+
+def _default(value: Any) -> Any:
+    # ObjectIds and the like; datetimes are handled natively by orjson
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode `value` as UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def ensure_format(fmt: str) -> None:
+    if fmt == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack output is not available on this server")
+
+
+def player_columns(players: Sequence[Mapping]) -> Dict[str, List]:
+    """PlayerOut-shaped dicts as parallel arrays, one per field."""
+    return {field: [p.get(field) for p in players] for field in PLAYER_FIELDS}
+
+
+def encode(value: Any, fmt: str) -> bytes:
+    """Encode `value` (already in columnar form for "columns") as JSON or MessagePack."""
+    if fmt == "msgpack":
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+    return dumps(value)
+
+
+def encode_players(players: Sequence[Mapping], fmt: str) -> bytes:
+    return encode(player_columns(players) if fmt == "columns" else players, fmt)
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Set
+
+from .singleflight import reads
+from .versions import bump_version
+
+# Per-subscriber buffer. A client that falls this far behind only needs the latest
+# events anyway, since every event just tells it to refetch.
+QUEUE_SIZE = 100
+
+# "local": events reach subscribers on this process only (single worker).
+# "changestream": events are delivered through a change stream on `leagues`, so
+# subscribers on every worker see them (requires a replica set).
+EVENT_FANOUT = os.getenv("EVENT_FANOUT", "local")
+
+
+class EventBroker:
+    """In-process fan-out of draft events to every subscriber of a league."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, league_name: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers[league_name].add(queue)
+        return queue
+
+    def unsubscribe(self, league_name: str, queue: asyncio.Queue) -> None:
+        subs = self._subscribers.get(league_name)
+        if not subs:
+            return
+        subs.discard(queue)
+        if not subs:
+            del self._subscribers[league_name]
+
+    def publish(self, league_name: str, event: Dict[str, Any]) -> None:
+        for queue in list(self._subscribers.get(league_name, ())):
+            if queue.full():
+                # Drop the oldest event rather than blocking the publisher
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+
+    def subscriber_count(self, league_name: str) -> int:
+        return len(self._subscribers.get(league_name, ()))
+
+
+broker = EventBroker()
+
+
+def build_event(league_name: str, event_type: str, **data: Any) -> Dict[str, Any]:
+    return {
+        "type": event_type,
+        "league_name": league_name,
+        "at": datetime.now(timezone.utc).isoformat(),
+        **data,
+    }
+
+
+def forget_stale_reads(league_name: str) -> None:
+    # Reads of the league already in flight may predate the change; readers reacting
+    # to the event must not join them
+    for kind in ("version", "config"):
+        reads.forget((kind, league_name))
+
+
+async def notify(league_name: str, event_type: str, **data: Any) -> Dict[str, Any]:
+    # Record the change against the league version, then tell subscribers about it.
+    # With changestream fan-out the listener delivers it instead, on every worker.
+    event = build_event(league_name, event_type, **data)
+    event["version"] = await bump_version(league_name, event)
+    forget_stale_reads(league_name)
+    if EVENT_FANOUT == "local":
+        broker.publish(league_name, event)
+    return event
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
@@ -0,0 +1,100 @@
+import csv
+import io
+import os
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List
+
+from .db import picks_col, players_col
+from .encoding import dumps
+
+# Streams a league's draft results straight off a Mongo cursor, so an export holds
+# one batch of rows in memory however large the league is.
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+EXPORT_FIELDS = ["overall", "round", "pick_in_round", "team_name", "player_id", "player_name", "position", "picked_at", "auto"]
+
+MEDIA_TYPES = {"csv": "text/csv", "json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+def _row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    picked_at = entry.get("picked_at")
+    if isinstance(picked_at, datetime):
+        picked_at = picked_at.replace(tzinfo=picked_at.tzinfo or timezone.utc).isoformat()
+    return {
+        "overall": entry.get("overall"),
+        "round": entry.get("round"),
+        "pick_in_round": entry.get("pick_in_round"),
+        "team_name": entry.get("team_name"),
+        "player_id": str(entry.get("player_id")),
+        "player_name": entry.get("player_name"),
+        "position": entry.get("position"),
+        "picked_at": picked_at,
+        "auto": bool(entry.get("auto", False)),
+    }
+
+
+async def pick_rows(league_name: str) -> AsyncIterator[Dict[str, Any]]:
+    """Every pick in the league, in draft order."""
+    log = picks_col()
+    if await log.find_one({"league_name": league_name}, {"_id": 1}):
+        cursor = log.find({"league_name": league_name}).sort("overall", 1).batch_size(EXPORT_BATCH_SIZE)
+        async for entry in cursor:
+            yield _row(entry)
+        return
+    # Leagues drafted before the pick log existed: order by draft time instead
+    cursor = (
+        players_col()
+        .find({"league_name": league_name, "drafted_by": {"$ne": None}}, {"name": 1, "position": 1, "drafted_by": 1, "drafted_at": 1})
+        .sort([("drafted_at", 1), ("_id", 1)])
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    overall = 0
+    async for doc in cursor:
+        overall += 1
+        yield _row(
+            {
+                "overall": overall,
+                "team_name": doc.get("drafted_by"),
+                "player_id": doc["_id"],
+                "player_name": doc.get("name"),
+                "position": doc.get("position"),
+                "picked_at": doc.get("drafted_at"),
+            }
+        )
+
+
+async def render(rows: AsyncIterator[Dict[str, Any]], fmt: str) -> AsyncIterator[bytes]:
+    """Encode `rows` as csv, json or ndjson, yielding one chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    parts: List[bytes] = []
+    if fmt == "csv":
+        writer.writeheader()
+    elif fmt == "json":
+        parts.append(b"[")
+    first = True
+    pending = 0
+    async for row in rows:
+        if fmt == "csv":
+            writer.writerow(row)
+        elif fmt == "json":
+            parts.append(dumps(row) if first else b"," + dumps(row))
+        else:
+            parts.append(dumps(row) + b"\n")
+        first = False
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield _drain(buffer, parts)
+            pending = 0
+    if fmt == "json":
+        parts.append(b"]")
+    yield _drain(buffer, parts)
+
+
+def _drain(buffer: io.StringIO, parts: List[bytes]) -> bytes:
+    chunk = buffer.getvalue().encode("utf-8") + b"".join(parts)
+    buffer.seek(0)
+    buffer.truncate()
+    parts.clear()
+    return chunk
@@ -0,0 +1,141 @@
+"""Index declarations for every collection, plus a query-plan check.
+
+Indexes are created at application startup. To verify that every query shape the
+routes issue is served by an index, run:
+
+    python -m backend.app.indexes --check
+
+which exits non-zero if any shape's winning plan falls back to a COLLSCAN.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from .db import get_db
+from .queries import AVAILABLE_SORT
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "players": [
+        # Available pool pages (ranked first, then by name), and roster lookups by team
+        IndexModel(
+            [("league_name", ASCENDING), ("drafted_by", ASCENDING), ("sort_rank", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+            name="league_drafted_by_sort_rank",
+        ),
+        # Same, filtered by position; also serves per-position roster counts
+        IndexModel(
+            [("league_name", ASCENDING), ("drafted_by", ASCENDING), ("position", ASCENDING), ("sort_rank", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+            name="league_drafted_by_position_sort_rank",
+        ),
+        # Rosters sorted by name
+        IndexModel([("league_name", ASCENDING), ("drafted_by", ASCENDING), ("name", ASCENDING)], name="league_drafted_by_name"),
+        # Recent picks, newest first
+        IndexModel([("league_name", ASCENDING), ("drafted_at", DESCENDING), ("_id", DESCENDING)], name="league_drafted_at"),
+    ],
+    "teams": [
+        IndexModel([("league_name", ASCENDING), ("team_name", ASCENDING)], unique=True, name="league_team_name"),
+    ],
+    "picks": [
+        # Pick log: tail reads for recent picks and ordered replay
+        IndexModel([("league_name", ASCENDING), ("overall", ASCENDING)], unique=True, name="league_overall"),
+    ],
+    "draft_config": [
+        IndexModel([("league_name", ASCENDING)], name="league_name"),
+    ],
+}
+
+
+async def ensure_indexes(db=None) -> None:
+    db = db if db is not None else get_db()
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as exc:
+            # e.g. duplicate team rows predating the unique index; keep serving
+            logger.warning("Could not create indexes on %s: %s", collection, exc)
+
+
+def _query_shapes(league: str = "__explain__", team: str = "__explain__") -> List[Tuple[str, str, Dict[str, Any], List[Tuple[str, int]]]]:
+    # (label, collection, filter, sort) for each query the routes issue
+    return [
+        ("available page", "players", {"drafted_by": None, "league_name": league}, AVAILABLE_SORT),
+        ("available by position", "players", {"drafted_by": None, "league_name": league, "position": "QB"}, AVAILABLE_SORT),
+        (
+            "available after cursor",
+            "players",
+            {
+                "drafted_by": None,
+                "league_name": league,
+                "$or": [
+                    {"sort_rank": {"$gt": 10}},
+                    {"sort_rank": 10, "name": {"$gt": "a"}},
+                    {"sort_rank": 10, "name": "a", "_id": {"$gt": ObjectId("0" * 24)}},
+                ],
+            },
+            AVAILABLE_SORT,
+        ),
+        ("drafted recent", "players", {"drafted_by": {"$ne": None}, "league_name": league}, [("drafted_at", -1), ("_id", -1)]),
+        ("roster board", "players", {"drafted_by": {"$ne": None}, "league_name": league}, [("name", 1)]),
+        ("team roster", "players", {"drafted_by": team, "league_name": league}, [("name", 1)]),
+        ("team position count", "players", {"drafted_by": team, "position": "QB", "league_name": league}, []),
+        ("upload max rank", "players", {"league_name": league, "rank": {"$ne": None}}, [("rank", -1)]),
+        ("recent picks", "picks", {"league_name": league}, [("overall", -1)]),
+        ("team list", "teams", {"league_name": league}, [("team_name", 1)]),
+        ("team lookup", "teams", {"team_name": team, "league_name": league}, []),
+    ]
+
+
+def _stages(plan: Any) -> List[str]:
+    found: List[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.append(plan["stage"])
+        for value in plan.values():
+            found.extend(_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            found.extend(_stages(value))
+    return found
+
+
+async def verify_query_plans(db=None) -> List[str]:
+    """Explain every route query shape; return a description of each one that collection-scans."""
+    db = db if db is not None else get_db()
+    failures: List[str] = []
+    for label, collection, filt, sort in _query_shapes():
+        cursor = db[collection].find(filt)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _stages(winning)
+        if "COLLSCAN" in stages:
+            failures.append(f"{label}: {collection}.find({filt}) sort={sort} -> {' <- '.join(stages)}")
+    return failures
+
+
+async def _main(check: bool) -> int:
+    db = get_db()
+    await ensure_indexes(db)
+    if not check:
+        return 0
+    failures = await verify_query_plans(db)
+    for failure in failures:
+        print(f"COLLSCAN {failure}", file=sys.stderr)
+    if not failures:
+        print("All query shapes use an index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create MongoDB indexes for the draft API")
+    parser.add_argument("--check", action="store_true", help="explain each route query and fail on COLLSCAN")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.check)))
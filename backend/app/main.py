@@ -1,8 +1,22 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
+from . import archive, db, mockdraft
+from .changefeed import change_feed
+from .compression import CompressionMiddleware
+from .events import EVENT_FANOUT
+from .indexes import ensure_indexes
+from .metrics import MetricsMiddleware, registry
+from .queries import backfill_sort_rank
+from .scheduler import pick_clock
+from .singleflight import reads
 from .routers import auth as auth_router
 from .routers import players as players_router
 from .routers import draft as draft_router
@@ -12,7 +26,43 @@ from .routers import teams as teams_router
 _dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
 load_dotenv(dotenv_path=_dotenv_path)
 
-app = FastAPI(title="Fantasy Draft API")
+logger = logging.getLogger(__name__)
+
+# Seconds /readyz waits for a ping before reporting the database unreachable
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "2"))
+
+_ready = False
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _ready
+    db.connect()
+    await db.warmup()
+    await ensure_indexes()
+    await backfill_sort_rank()
+    await pick_clock.rebuild()
+    pick_clock.start()
+    if EVENT_FANOUT == "changestream":
+        change_feed.start()
+    archiver = asyncio.create_task(archive.run_periodically()) if archive.ARCHIVE_INTERVAL_HOURS > 0 else None
+    _ready = True
+    try:
+        yield
+    finally:
+        # The server has stopped taking requests; stop background work that uses
+        # the client before closing its pool
+        _ready = False
+        if archiver is not None:
+            archiver.cancel()
+        await change_feed.stop()
+        await pick_clock.stop()
+        mockdraft.shutdown()
+        db.close()
+        logger.info("Shut down cleanly")
+
+
+app = FastAPI(title="Fantasy Draft API", lifespan=lifespan)
 
 origins = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",")]
 app.add_middleware(
@@ -21,7 +71,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Pool-Version"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router.router, prefix="/auth", tags=["auth"])
 app.include_router(players_router.router, prefix="/players", tags=["players"])
@@ -32,3 +85,27 @@ app.include_router(teams_router.router, prefix="/teams", tags=["teams"])
 @app.get("/")
 def root():
     return {"status": "ok"}
+
+
+@app.get("/healthz", include_in_schema=False)
+def healthz():
+    # Liveness: the process is serving requests; says nothing about MongoDB
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    # Readiness: started up, not shutting down, and MongoDB answers a ping
+    if not _ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    try:
+        await reads.do(("ping",), lambda: asyncio.wait_for(db.ping(), READY_TIMEOUT))
+    except Exception as exc:
+        return JSONResponse({"status": "unavailable", "detail": str(exc) or type(exc).__name__}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
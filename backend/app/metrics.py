@@ -0,0 +1,183 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+from pymongo import monitoring
+
+# Minimal Prometheus text-format metrics. Values may be recorded from motor's worker
+# threads (command monitoring), so every metric guards its state with a lock.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    le = _labels(self.labelnames, labels, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _labels(self.labelnames, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time from request start until response headers are sent, by route template.",
+        ("method", "route", "status"),
+    )
+)
+MONGO_COMMANDS = registry.register(
+    Counter("mongo_commands_total", "MongoDB commands issued, by collection and command.", ("collection", "command", "outcome"))
+)
+MONGO_LATENCY = registry.register(
+    Histogram("mongo_command_duration_seconds", "MongoDB command round-trip time.", ("collection", "command"))
+)
+COALESCED_READS = registry.register(
+    Counter("coalesced_reads_total", "Reads that joined an identical in-flight query instead of issuing their own.", ("kind",))
+)
+
+
+def route_label(scope) -> str:
+    """The matched route template with its router prefix, e.g. /teams/by_name/{target_team}.
+
+    Newer FastAPI versions match router-level routes under a root_path holding the
+    prefix, so the route's own path alone would drop it.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not path:
+        return "unmatched"
+    return scope.get("root_path", "") + path
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses (SSE) pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Label by route template so league and team names never become label values
+                REQUEST_LATENCY.observe(
+                    time.perf_counter() - started, scope["method"], route_label(scope), str(message["status"])
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _collection(event: monitoring.CommandStartedEvent) -> str:
+    target = event.command.get(event.command_name)
+    if isinstance(target, str):
+        return target
+    # getMore carries the cursor id under its own name
+    return str(event.command.get("collection", ""))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._pending: Dict[Tuple[int, object], str] = {}
+        self._lock = threading.Lock()
+
+    def _finish(self, event, outcome: str) -> None:
+        with self._lock:
+            collection = self._pending.pop((event.request_id, event.connection_id), "")
+        MONGO_COMMANDS.inc(collection, event.command_name, outcome)
+        MONGO_LATENCY.observe(event.duration_micros / 1_000_000, collection, event.command_name)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = _collection(event)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "error")
+
+
+mongo_listener = MongoCommandListener()
@@ -0,0 +1,182 @@
+"""Monte Carlo mock drafts.
+
+Simulates the rest of a snake draft many times over and reports how likely each
+player is to still be on the board at each of one team's upcoming picks.
+
+Opponents draft the best eligible player by a noisy ADP: a player's position in the
+ranked pool, jittered per simulation with a spread that grows with the rank. The
+simulated team itself takes the best eligible player by plain rank. Eligibility uses
+the same position caps and ANY slots as /draft/pick (see rules.pick_violation).
+
+All simulations of a chunk advance together, one pick at a time, as NumPy arrays of
+shape (simulations, players); chunks can be spread over a process pool. This module
+only depends on NumPy and the pure draft rules, so pool workers import it cheaply.
+"""
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .rules import parse_limit, snake_team
+
+# Simulations per unit of work handed to a pool worker
+SIM_CHUNK = int(os.getenv("SIM_CHUNK", "1000"))
+SIM_WORKERS = int(os.getenv("SIM_WORKERS", str(os.cpu_count() or 1)))
+
+# Players with a lower chance than this of being available are left out of the report
+MIN_PROBABILITY = 0.005
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def process_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared worker pool, or None when SIM_WORKERS is 0 (simulate in the calling thread)."""
+    global _executor
+    if _executor is None and SIM_WORKERS > 0:
+        # spawn, not fork: the server process has Mongo and executor threads running
+        _executor = ProcessPoolExecutor(max_workers=SIM_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _eligible_positions(counts: np.ndarray, caps: np.ndarray, has_cap: np.ndarray, any_limit: int) -> np.ndarray:
+    # counts: (sims, positions) for the team on the clock -> (sims, positions) bool
+    under_cap = has_cap & (counts < caps)
+    any_used = np.maximum(counts - caps, 0).sum(axis=1)
+    return under_cap | ((any_limit - any_used) > 0)[:, None]
+
+
+def _simulate_chunk(
+    adp: np.ndarray,
+    positions: np.ndarray,
+    caps: np.ndarray,
+    has_cap: np.ndarray,
+    any_limit: int,
+    start_counts: np.ndarray,
+    schedule: np.ndarray,
+    my_team: int,
+    sims: int,
+    noise: float,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """Run `sims` drafts; return how often each player was available at each of `my_team`'s picks."""
+    rng = np.random.default_rng(seed)
+    n_players = adp.shape[0]
+    spread = np.maximum(noise * adp, 1.0).astype(np.float32) if noise > 0 else np.zeros(n_players, np.float32)
+    # Taken players get an infinite key, so picking is an argmin over each row
+    keys = adp.astype(np.float32) + rng.standard_normal((sims, n_players), dtype=np.float32) * spread
+    my_keys = np.repeat(adp.astype(np.float32)[None, :], sims, axis=0)
+    counts = np.repeat(start_counts[None, :, :], sims, axis=0)
+    rows = np.arange(sims)
+    available = np.zeros((int((schedule == my_team).sum()), n_players), dtype=np.int64)
+    mine = 0
+
+    for team in schedule:
+        eligible = _eligible_positions(counts[:, team, :], caps, has_cap, any_limit)
+        blocked = np.where(eligible, np.float32(0), np.float32(np.inf))[:, positions]
+        if team == my_team:
+            available[mine] = np.isfinite(my_keys).sum(axis=0)
+            mine += 1
+            score = my_keys + blocked
+        else:
+            score = keys + blocked
+        choice = score.argmin(axis=1)
+        # A team with nothing it can roster passes
+        picked = np.isfinite(score[rows, choice])
+        r, c = rows[picked], choice[picked]
+        keys[r, c] = np.inf
+        my_keys[r, c] = np.inf
+        counts[r, team, positions[c]] += 1
+    return available
+
+
+def simulate_draft(
+    players: Sequence[Dict],
+    draft_order: List[str],
+    position_limits: Dict[str, int],
+    team_name: str,
+    current_pick_index: int = 0,
+    team_counts: Optional[Dict[str, Dict[str, int]]] = None,
+    rounds: Optional[int] = None,
+    simulations: int = 1000,
+    noise: float = 0.2,
+    players_per_pick: int = 25,
+    seed: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> Dict:
+    """Simulate the rest of a snake draft `simulations` times.
+
+    `players` is the available pool in rank order (as served by /players/available);
+    `team_counts` holds each team's drafted players per position so far. `rounds`
+    defaults to the roster size implied by `position_limits`. Chunks run on
+    `executor` if given, else in the calling thread.
+
+    Returns, for each of `team_name`'s remaining picks, up to `players_per_pick` of
+    the best-ranked players with their probability of still being available.
+    """
+    if team_name not in draft_order:
+        raise ValueError(f"{team_name} is not in the draft order")
+    limits = {pos: parse_limit(value) for pos, value in (position_limits or {}).items()}
+    any_limit = limits.pop("ANY", None) or 0
+    if rounds is None:
+        rounds = sum(v for v in limits.values() if v) + any_limit
+    n_teams = len(draft_order)
+    picks = range(current_pick_index, rounds * n_teams)
+    schedule = np.array([draft_order.index(snake_team(draft_order, i)) for i in picks], dtype=np.int64)
+    my_team = draft_order.index(team_name)
+    my_picks = [i for i in picks if snake_team(draft_order, i) == team_name]
+    result: Dict = {"simulations": simulations, "team_name": team_name, "picks": []}
+    if not my_picks or not players:
+        return result
+
+    # Players ranked far below the number of picks left are never reached
+    pool = list(players[: min(len(players), len(schedule) * 3 + 100)])
+    names = sorted({p["position"] for p in pool} | set(limits) | {pos for c in (team_counts or {}).values() for pos in c})
+    index = {pos: i for i, pos in enumerate(names)}
+    caps = np.array([limits.get(pos) or 0 for pos in names], dtype=np.int64)
+    has_cap = np.array([limits.get(pos) is not None for pos in names], dtype=bool)
+    start_counts = np.zeros((n_teams, len(names)), dtype=np.int64)
+    for t, team in enumerate(draft_order):
+        for pos, n in ((team_counts or {}).get(team) or {}).items():
+            start_counts[t, index[pos]] = n
+    adp = np.arange(1, len(pool) + 1, dtype=np.float64)
+    positions = np.array([index[p["position"]] for p in pool], dtype=np.int64)
+
+    sizes = [SIM_CHUNK] * (simulations // SIM_CHUNK)
+    if simulations % SIM_CHUNK:
+        sizes.append(simulations % SIM_CHUNK)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(adp, positions, caps, has_cap, any_limit, start_counts, schedule, my_team, n, noise, s) for n, s in zip(sizes, seeds)]
+    if executor is not None:
+        chunks = list(executor.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*a) for a in args]
+    probability = np.sum(chunks, axis=0) / simulations
+
+    for k, overall in enumerate(my_picks):
+        top = [i for i in range(len(pool)) if probability[k, i] >= MIN_PROBABILITY][:players_per_pick]
+        result["picks"].append(
+            {
+                "overall": overall + 1,
+                "round": overall // n_teams + 1,
+                "players": [
+                    {
+                        "id": pool[i]["id"],
+                        "name": pool[i]["name"],
+                        "position": pool[i]["position"],
+                        "rank": pool[i].get("rank"),
+                        "probability": round(float(probability[k, i]), 4),
+                    }
+                    for i in top
+                ],
+            }
+        )
+    return result
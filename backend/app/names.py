@@ -0,0 +1,19 @@
+import re
+import unicodedata
+
+_PARENTHETICAL = re.compile(r"\([^)]*\)")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+
+
+def normalize_name(name: str) -> str:
+    """Fold a player name to a comparison key.
+
+    "Patrick Mahomes II (Chiefs)" and "patrick mahomes" both become "patrick mahomes":
+    accents, case, punctuation, generational suffixes and parenthesised team
+    tags are dropped.
+    """
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    name = _PARENTHETICAL.sub(" ", name.lower())
+    tokens = [t for t in _NON_ALNUM.sub(" ", name).split() if t not in _SUFFIXES]
+    return " ".join(tokens)
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict
+
+import bcrypt
+
+# bcrypt is deliberately slow (~200ms at the default cost). Run it on a small
+# dedicated pool so a burst of logins queues there instead of blocking the event loop
+# or exhausting the default threadpool that other blocking work shares.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", "2"))
+
+# Failed logins allowed per league within the window before further attempts get 429
+LOGIN_MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", "10"))
+LOGIN_FAILURE_WINDOW = float(os.getenv("LOGIN_FAILURE_WINDOW", "60"))
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = await loop.run_in_executor(_executor, bcrypt.hashpw, password.encode("utf-8"), salt)
+    return hashed.decode("utf-8")
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, bcrypt.checkpw, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+
+class LoginThrottle:
+    """Sliding-window count of failed logins per league."""
+
+    def __init__(self, max_failures: int = LOGIN_MAX_FAILURES, window: float = LOGIN_FAILURE_WINDOW):
+        self._max_failures = max_failures
+        self._window = window
+        self._failures: Dict[str, Deque[float]] = {}
+
+    def _prune(self, key: str, now: float) -> Deque[float]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return deque()
+        while failures and failures[0] <= now - self._window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+        return failures
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until `key` may try again, or 0 if it is not throttled."""
+        now = time.monotonic()
+        failures = self._prune(key, now)
+        if len(failures) < self._max_failures:
+            return 0
+        return max(failures[0] + self._window - now, 0.0)
+
+    def record_failure(self, key: str) -> None:
+        self._failures.setdefault(key, deque()).append(time.monotonic())
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,275 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateOne
+
+from .db import config_col, picks_col, players_col, teams_col
+from .queries import AVAILABLE_SORT, get_config_doc
+from .rules import draft_complete, eligible_positions, pick_violation
+
+# A pick is committed as a chain of compare-and-set writes, each of which is atomic on
+# its own document, with compensating writes if a later step loses a race:
+#   1. team:   pick_count n -> n+1, position_counts[pos] += 1
+#   2. config: current_pick_index idx -> idx+1
+#   3. player: drafted_by None -> team
+# Step 1 guards the roster-limit check against a concurrent pick by the same team,
+# step 2 guarantees exactly one pick per slot, step 3 that a player is drafted once.
+
+
+async def team_position_counts(league_name: str, team_name: str) -> Tuple[Dict[str, int], int]:
+    """Return the team's per-position counters and pick count, backfilling them if missing."""
+    tcol = teams_col()
+    team = await tcol.find_one(
+        {"team_name": team_name, "league_name": league_name},
+        {"position_counts": 1, "pick_count": 1},
+    )
+    if not team:
+        raise HTTPException(status_code=403, detail="Team is not registered in this league")
+    if "position_counts" in team:
+        return dict(team.get("position_counts") or {}), int(team.get("pick_count", 0) or 0)
+
+    # Teams created before the counters existed: derive them once from the roster
+    counts: Dict[str, int] = {}
+    pipeline = [
+        {"$match": {"drafted_by": team_name, "league_name": league_name}},
+        {"$group": {"_id": "$position", "n": {"$sum": 1}}},
+    ]
+    async for doc in players_col().aggregate(pipeline):
+        counts[doc["_id"]] = doc["n"]
+    pick_count = sum(counts.values())
+    await tcol.update_one(
+        {"_id": team["_id"], "position_counts": {"$exists": False}},
+        {"$set": {"position_counts": counts, "pick_count": pick_count}},
+    )
+    return counts, pick_count
+
+
+async def team_eligible_positions(league_name: str, team_name: str, positions: Iterable[str]) -> Optional[FrozenSet[str]]:
+    """Which of `positions` the team may still draft under make_pick's rules, from its cached counters.
+
+    Returns None when the draft is not configured, i.e. there is nothing to filter by.
+    """
+    cfg, (counts, _) = await asyncio.gather(get_config_doc(league_name), team_position_counts(league_name, team_name))
+    if not cfg:
+        return None
+    return frozenset(eligible_positions(positions, counts, cfg.get("position_limits", {}) or {}))
+
+
+def next_pick_deadline(cfg: Dict, pick_index: int) -> Optional[datetime]:
+    """Deadline for the pick at `pick_index`, if the league runs a pick clock and the draft has that pick."""
+    seconds = cfg.get("pick_seconds")
+    if not seconds or not cfg.get("draft_started") or draft_complete(cfg, pick_index):
+        return None
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+async def commit_pick(
+    cfg: Dict,
+    team_name: str,
+    player_id: str,
+    next_deadline: Optional[datetime] = None,
+    auto: bool = False,
+) -> Dict:
+    """Validate and atomically commit `team_name` drafting `player_id` at the config's current index.
+
+    The caller is responsible for checking that it is `team_name`'s turn.
+    `next_deadline` becomes the pick clock for the following pick.
+    Returns the drafted player document.
+    """
+    league_name = cfg["league_name"]
+    idx = cfg.get("current_pick_index", 0)
+    try:
+        oid = ObjectId(player_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid player id")
+
+    pcol = players_col()
+    player, (counts, pick_count) = await asyncio.gather(
+        pcol.find_one({"_id": oid, "league_name": league_name}, {"name": 1, "position": 1, "drafted_by": 1}),
+        team_position_counts(league_name, team_name),
+    )
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+    if player.get("drafted_by"):
+        raise HTTPException(status_code=400, detail="Player already drafted")
+
+    # Enforce position limits, with support for ANY slots
+    position = player.get("position")
+    limits: Dict[str, int] = cfg.get("position_limits", {}) or {}
+    violation = pick_violation(position, counts, limits)
+    if violation:
+        raise HTTPException(status_code=400, detail=violation)
+
+    tcol = teams_col()
+    team_filter = {"team_name": team_name, "league_name": league_name}
+    counter = f"position_counts.{position}"
+    claimed = await tcol.update_one(
+        {**team_filter, "pick_count": pick_count},
+        {"$inc": {"pick_count": 1, counter: 1}},
+    )
+    if claimed.modified_count == 0:
+        raise HTTPException(status_code=409, detail="Roster changed during pick; please retry")
+
+    async def release_team():
+        await tcol.update_one({**team_filter, "pick_count": pick_count + 1}, {"$inc": {"pick_count": -1, counter: -1}})
+
+    cfg_id = f"config:{league_name}"
+    advanced = await config_col().update_one(
+        {"_id": cfg_id, "current_pick_index": idx},
+        {"$inc": {"current_pick_index": 1}, "$set": {"pick_deadline": next_deadline}},
+    )
+    if advanced.modified_count == 0:
+        await release_team()
+        raise HTTPException(status_code=409, detail="Pick already made; please refresh")
+
+    drafted_at = datetime.utcnow()
+    drafted = await pcol.update_one(
+        {"_id": oid, "drafted_by": None, "league_name": league_name},
+        {"$set": {"drafted_by": team_name, "drafted_at": drafted_at}},
+    )
+    if drafted.modified_count == 0:
+        await asyncio.gather(
+            config_col().update_one(
+                {"_id": cfg_id, "current_pick_index": idx + 1},
+                {"$inc": {"current_pick_index": -1}, "$set": {"pick_deadline": cfg.get("pick_deadline")}},
+            ),
+            release_team(),
+        )
+        raise HTTPException(status_code=400, detail="Player already drafted")
+
+    player.update({"drafted_by": team_name, "drafted_at": drafted_at})
+    await _log_pick(cfg, idx, team_name, player, auto)
+    return player
+
+
+async def _log_pick(cfg: Dict, idx: int, team_name: str, player: Dict, auto: bool) -> None:
+    # Append to the pick log. Keyed by overall pick, so re-drafting a slot after a
+    # config reset replaces the stale entry instead of colliding with it.
+    n = len(cfg.get("draft_order", [])) or 1
+    entry = {
+        "league_name": cfg["league_name"],
+        "overall": idx + 1,
+        "round": idx // n + 1,
+        "pick_in_round": idx % n + 1,
+        "team_name": team_name,
+        "player_id": player["_id"],
+        "player_name": player.get("name"),
+        "position": player.get("position"),
+        "picked_at": player["drafted_at"],
+        "auto": auto,
+    }
+    await picks_col().replace_one({"league_name": entry["league_name"], "overall": entry["overall"]}, entry, upsert=True)
+
+
+async def undo_last_pick(cfg: Dict, next_deadline: Optional[datetime] = None) -> Optional[Dict]:
+    """Take back the most recent logged pick. Returns the removed log entry, or None if there is none."""
+    league_name = cfg["league_name"]
+    last = await picks_col().find_one({"league_name": league_name}, sort=[("overall", -1)])
+    if not last:
+        return None
+    overall = last["overall"]
+    # Reopen the slot first; this fails if a pick or another undo moved the index
+    reopened = await config_col().update_one(
+        {"_id": f"config:{league_name}", "current_pick_index": overall},
+        {"$set": {"current_pick_index": overall - 1, "pick_deadline": next_deadline}},
+    )
+    if reopened.modified_count == 0:
+        raise HTTPException(status_code=409, detail="Draft moved on; please refresh")
+    team_name = last["team_name"]
+    await asyncio.gather(
+        players_col().update_one(
+            {"_id": last["player_id"], "league_name": league_name, "drafted_by": team_name},
+            {"$set": {"drafted_by": None}, "$unset": {"drafted_at": ""}},
+        ),
+        teams_col().update_one(
+            {"team_name": team_name, "league_name": league_name, "pick_count": {"$gt": 0}},
+            {"$inc": {"pick_count": -1, f"position_counts.{last.get('position')}": -1}},
+        ),
+        picks_col().delete_one({"_id": last["_id"]}),
+    )
+    return last
+
+
+async def replay_pick_log(cfg: Dict) -> Tuple[int, Optional[datetime]]:
+    """Rebuild drafted_by, team counters and current_pick_index from the pick log.
+
+    Returns the number of picks replayed and the pick clock now running, if any.
+    """
+    league_name = cfg["league_name"]
+    log = [entry async for entry in picks_col().find({"league_name": league_name}).sort("overall", 1)]
+    pcol = players_col()
+    tcol = teams_col()
+    await pcol.update_many(
+        {"league_name": league_name, "drafted_by": {"$ne": None}},
+        {"$set": {"drafted_by": None}, "$unset": {"drafted_at": ""}},
+    )
+    counts: Dict[str, Dict[str, int]] = {}
+    ops = []
+    for entry in log:
+        ops.append(UpdateOne(
+            {"_id": entry["player_id"], "league_name": league_name},
+            {"$set": {"drafted_by": entry["team_name"], "drafted_at": entry["picked_at"]}},
+        ))
+        team = counts.setdefault(entry["team_name"], {})
+        team[entry.get("position")] = team.get(entry.get("position"), 0) + 1
+    if ops:
+        await pcol.bulk_write(ops, ordered=False)
+
+    await tcol.update_many({"league_name": league_name}, {"$set": {"position_counts": {}, "pick_count": 0}})
+    for team_name, by_position in counts.items():
+        await tcol.update_one(
+            {"team_name": team_name, "league_name": league_name},
+            {"$set": {"position_counts": by_position, "pick_count": sum(by_position.values())}},
+        )
+    next_deadline = next_pick_deadline(cfg, len(log))
+    await config_col().update_one(
+        {"_id": f"config:{league_name}"},
+        {"$set": {"current_pick_index": len(log), "pick_deadline": next_deadline}},
+    )
+    return len(log), next_deadline
+
+
+async def autodraft(cfg: Dict, team_name: str, next_deadline: Optional[datetime] = None) -> Optional[Dict]:
+    """Pick for `team_name`: the first eligible player in its saved queue, else the best-ranked eligible player.
+
+    Returns the drafted player, or None if no available player can be rostered.
+    """
+    league_name = cfg["league_name"]
+    limits: Dict[str, int] = cfg.get("position_limits", {}) or {}
+    pcol = players_col()
+    counts, _ = await team_position_counts(league_name, team_name)
+    team = await teams_col().find_one({"team_name": team_name, "league_name": league_name}, {"queue": 1})
+
+    candidates: List[str] = []
+    queue = [ObjectId(pid) for pid in (team or {}).get("queue", []) if ObjectId.is_valid(pid)]
+    if queue:
+        queued = {}
+        async for doc in pcol.find({"_id": {"$in": queue}, "league_name": league_name, "drafted_by": None}, {"position": 1}):
+            queued[doc["_id"]] = doc
+        for oid in queue:
+            doc = queued.get(oid)
+            if doc and pick_violation(doc.get("position"), counts, limits) is None:
+                candidates.append(str(oid))
+
+    positions = await pcol.distinct("position", {"league_name": league_name, "drafted_by": None})
+    eligible = eligible_positions(positions, counts, limits)
+    if eligible:
+        # A few best-ranked fallbacks in case a queued player is taken under us
+        cursor = pcol.find(
+            {"league_name": league_name, "drafted_by": None, "position": {"$in": eligible}},
+            {"_id": 1},
+        ).sort(AVAILABLE_SORT).limit(3)
+        async for doc in cursor:
+            candidates.append(str(doc["_id"]))
+
+    for player_id in candidates:
+        try:
+            return await commit_pick(cfg, team_name, player_id, next_deadline, auto=True)
+        except HTTPException as exc:
+            # 409 means the slot itself was taken; anything else is specific to this player
+            if exc.status_code == 409:
+                raise
+    return None
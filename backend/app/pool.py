@@ -0,0 +1,267 @@
+import asyncio
+import os
+from collections import OrderedDict, deque
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from .archive import restored_version_doc
+from .db import players_col, teams_col
+from .compression import compress
+from .encoding import encode_players
+from .queries import AVAILABLE_PROJECTION, AVAILABLE_SORT, get_config_doc
+from .search import NameIndex
+from .singleflight import reads
+from .value import ValueModel, rank_order
+
+# Per-league cache of the available pool, encoded once per league version.
+#
+# Every team in a league polls the same pool, so it is built once per version and
+# served as pre-encoded (and optionally compressed) bytes. A version whose only change is
+# a single pick is derived from the previous one by dropping the drafted player,
+# without touching Mongo. Those pick transitions are also kept as a small diff so clients
+# can ask for just the changes since the version they already hold; any other change
+# (uploads, merges, config) clears the history and `since` falls back to the full pool.
+
+POOL_CACHE_LEAGUES = int(os.getenv("POOL_CACHE_LEAGUES", "256"))
+# Version transitions kept per league for `since` requests
+POOL_HISTORY = int(os.getenv("POOL_HISTORY", "64"))
+
+# Events that never change the available pool. Not "config": it rewrites each player's
+# stored vor / value_rank.
+_POOL_NEUTRAL_EVENTS = {"start", "teams"}
+
+
+class PoolEntry:
+    def __init__(
+        self,
+        version: int,
+        players: List[Dict],
+        name_index: Optional[NameIndex] = None,
+        value_model: Optional[ValueModel] = None,
+    ):
+        self.version = version
+        self.players = players
+        self._name_index = name_index
+        self._value_model = value_model
+        # The pool ordered by live value over replacement, once someone asks for it
+        self.by_value: Optional[List[Dict]] = None
+        self._positions: Optional[FrozenSet[str]] = None
+        # Encodings keyed by (position filter, eligible positions, order, format),
+        # compressed ones by content coding as well
+        self._encoded: Dict[Tuple, bytes] = {}
+        self._compressed: Dict[Tuple, bytes] = {}
+
+    @property
+    def positions(self) -> FrozenSet[str]:
+        if self._positions is None:
+            self._positions = frozenset(p["position"] for p in self.players)
+        return self._positions
+
+    @property
+    def name_index(self) -> NameIndex:
+        # Built on the first search after an upload; picks update it in place
+        if self._name_index is None:
+            self._name_index = NameIndex(self.players)
+        return self._name_index
+
+    @property
+    def value_model(self) -> ValueModel:
+        if self._value_model is None:
+            self._value_model = ValueModel.from_players(self.players)
+        return self._value_model
+
+    def rank_by_value(self, limits: Dict[str, int], team_counts: List[Dict[str, int]]) -> List[Dict]:
+        """Order the pool by VOR against the starter slots teams still have open."""
+        if self.by_value is None:
+            model = self.value_model
+            vor = model.vor(*model.slots(limits, team_counts))
+            self.by_value = [
+                {**self.players[i], "vor": None if np.isnan(vor[i]) else round(float(vor[i]), 2)}
+                for i in rank_order(vor)
+            ]
+        return self.by_value
+
+    def filtered(
+        self,
+        position: Optional[str] = None,
+        allowed: Optional[FrozenSet[str]] = None,
+        by_value: bool = False,
+    ) -> List[Dict]:
+        # by_value requires rank_by_value() to have run for this entry
+        players = self.by_value if by_value else self.players
+        if not position and allowed is None:
+            return players
+        return [
+            p for p in players
+            if (not position or p["position"] == position) and (allowed is None or p["position"] in allowed)
+        ]
+
+    def body(
+        self,
+        position: Optional[str] = None,
+        allowed: Optional[FrozenSet[str]] = None,
+        by_value: bool = False,
+        fmt: str = "json",
+    ) -> bytes:
+        key = (position, allowed, by_value, fmt)
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            encoded = self._encoded[key] = encode_players(self.filtered(position, allowed, by_value), fmt)
+        return encoded
+
+    def compressed(
+        self,
+        encoding: str,
+        position: Optional[str] = None,
+        allowed: Optional[FrozenSet[str]] = None,
+        by_value: bool = False,
+        fmt: str = "json",
+    ) -> bytes:
+        key = (encoding, position, allowed, by_value, fmt)
+        compressed = self._compressed.get(key)
+        if compressed is None:
+            compressed = self._compressed[key] = compress(self.body(position, allowed, by_value, fmt), encoding)
+        return compressed
+
+
+# (from_version, to_version, removed ids, added players)
+Transition = Tuple[int, int, List[str], List[Dict]]
+
+
+def _player(doc: Dict) -> Dict:
+    # Same shape as PlayerOut
+    return {
+        "id": str(doc["_id"]),
+        "name": doc.get("name"),
+        "position": doc.get("position"),
+        "drafted_by": None,
+        "rank": doc.get("rank"),
+        "projection": doc.get("projection"),
+        "vor": doc.get("vor"),
+        "value_rank": doc.get("value_rank"),
+    }
+
+
+async def value_ranked(entry: PoolEntry, league_name: str) -> List[Dict]:
+    """The entry's pool ordered by live VOR, fetching the config and team counters on first use."""
+    if entry.by_value is None:
+        cfg, teams = await asyncio.gather(
+            get_config_doc(league_name),
+            teams_col().find({"league_name": league_name}, {"position_counts": 1}).to_list(None),
+        )
+        team_counts = [t.get("position_counts") or {} for t in teams]
+        entry.rank_by_value((cfg or {}).get("position_limits", {}) or {}, team_counts)
+    return entry.by_value
+
+
+async def _load_pool(league_name: str) -> List[Dict]:
+    cursor = players_col().find({"league_name": league_name, "drafted_by": None}, AVAILABLE_PROJECTION).sort(AVAILABLE_SORT)
+    return [_player(doc) async for doc in cursor]
+
+
+class PoolCache:
+    def __init__(self, max_leagues: int = POOL_CACHE_LEAGUES, history: int = POOL_HISTORY):
+        self._max_leagues = max_leagues
+        self._history_size = history
+        self._entries: "OrderedDict[str, PoolEntry]" = OrderedDict()
+        self._history: Dict[str, Deque[Transition]] = {}
+
+    async def get(self, league_name: str) -> PoolEntry:
+        """The pool at the league's current version, building or patching it as needed."""
+        doc = await restored_version_doc(league_name)
+        version, last_event = int(doc.get("version", 0) or 0), doc.get("last_event")
+        entry = self._entries.get(league_name)
+        if entry is not None and entry.version == version:
+            self._entries.move_to_end(league_name)
+            return entry
+
+        patched = self._patch(entry, version, last_event) if entry is not None else None
+        if patched is not None:
+            new_entry, removed = patched
+            self._store(league_name, new_entry, (entry.version, version, removed, []))
+            return new_entry
+
+        players = await reads.do(("pool", league_name, version), lambda: _load_pool(league_name))
+        new_entry = PoolEntry(version, players)
+        # Another request may have stored a pool while we read
+        base = self._entries.get(league_name)
+        if base is not None and base.version >= version:
+            return base if base.version == version else new_entry
+        # A reload may have rewritten players in place (merge uploads, config), which an
+        # id diff cannot express, so the history restarts here
+        self._store(league_name, new_entry, None)
+        return new_entry
+
+    def _patch(self, entry: PoolEntry, version: int, last_event: Optional[Dict]) -> Optional[Tuple[PoolEntry, List[str]]]:
+        # Only a single-step change whose event is stored on the league can be applied in place
+        if version != entry.version + 1 or not last_event:
+            return None
+        kind = last_event.get("type")
+        if kind in _POOL_NEUTRAL_EVENTS:
+            # Team changes can move replacement levels, so by_value is not carried over
+            return PoolEntry(version, entry.players, entry._name_index, entry._value_model), []
+        if kind == "pick" and last_event.get("player_id"):
+            player_id = last_event["player_id"]
+            picked = next((i for i, p in enumerate(entry.players) if p["id"] == player_id), None)
+            if picked is None:
+                return PoolEntry(version, entry.players, entry._name_index, entry._value_model), [player_id]
+            if entry._name_index is not None:
+                entry._name_index.remove(player_id)
+            model = entry._value_model.without(picked) if entry._value_model is not None else None
+            players = entry.players[:picked] + entry.players[picked + 1:]
+            return PoolEntry(version, players, entry._name_index, model), [player_id]
+        return None
+
+    def _store(self, league_name: str, entry: PoolEntry, transition: Optional[Transition]) -> None:
+        self._entries[league_name] = entry
+        self._entries.move_to_end(league_name)
+        history = self._history.setdefault(league_name, deque(maxlen=self._history_size))
+        if transition is None:
+            history.clear()
+        else:
+            history.append(transition)
+        while len(self._entries) > self._max_leagues:
+            evicted, _ = self._entries.popitem(last=False)
+            self._history.pop(evicted, None)
+
+    def changes_since(
+        self,
+        league_name: str,
+        since: int,
+        position: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Net removals and additions from `since` to the cached version, or None if unknown."""
+        entry = self._entries.get(league_name)
+        if entry is None or since > entry.version:
+            return None
+        removed: Dict[str, None] = {}
+        added: Dict[str, Dict] = {}
+        covered = since
+        for from_version, to_version, gone, new in self._history.get(league_name, ()):
+            if to_version <= since:
+                continue
+            if from_version > covered:
+                return None  # a gap in the history
+            for player_id in gone:
+                if added.pop(player_id, None) is None:
+                    removed[player_id] = None
+            for player in new:
+                removed.pop(player["id"], None)
+                added[player["id"]] = player
+            covered = to_version
+        if covered != entry.version:
+            return None
+        return {
+            "version": entry.version,
+            "full": False,
+            "removed": list(removed),
+            "added": [p for p in added.values() if not position or p["position"] == position],
+        }
+
+    def invalidate(self, league_name: str) -> None:
+        self._entries.pop(league_name, None)
+        self._history.pop(league_name, None)
+
+
+pool_cache = PoolCache()
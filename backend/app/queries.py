@@ -0,0 +1,239 @@
+import base64
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from .db import config_col, migrations_col, picks_col, players_col, teams_col
+from .rules import snake_team
+from .schemas import DraftedPlayerOut, DraftStateOut, PlayerOut, TeamRosterOut
+
+# Read paths shared by the individual routes and the combined /draft/snapshot.
+
+UNRANKED = 2**31 - 1
+AVAILABLE_SORT = [("sort_rank", 1), ("name", 1), ("_id", 1)]
+AVAILABLE_PROJECTION = {"name": 1, "position": 1, "rank": 1, "sort_rank": 1, "projection": 1, "vor": 1, "value_rank": 1}
+
+
+async def get_config_doc(league_name: str) -> Dict | None:
+    return await config_col().find_one({"_id": f"config:{league_name}"})
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Mongo hands back naive UTC datetimes; label them so clients don't read local time
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def draft_state(cfg: Dict | None) -> DraftStateOut:
+    if not cfg:
+        return DraftStateOut(position_limits={}, draft_order=[], current_pick_index=0, current_team=None, draft_started=False)
+    idx = cfg.get("current_pick_index", 0)
+    order = cfg.get("draft_order", [])
+    return DraftStateOut(
+        position_limits=cfg.get("position_limits", {}),
+        draft_order=order,
+        current_pick_index=idx,
+        current_team=snake_team(order, idx),
+        draft_started=bool(cfg.get("draft_started", False)),
+        pick_seconds=cfg.get("pick_seconds"),
+        pick_deadline=_utc(cfg.get("pick_deadline")),
+    )
+
+
+def sort_rank(rank: Optional[int]) -> int:
+    # Ranked players sort by rank and unranked ones after all of them, so the pool
+    # can be served by one index-backed query ordered on (sort_rank, name, _id).
+    return rank if rank is not None else UNRANKED
+
+
+def encode_cursor(doc: Dict) -> str:
+    raw = json.dumps([doc.get("sort_rank"), doc.get("name"), str(doc.get("_id"))])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str, ObjectId]:
+    try:
+        rank, name, oid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(rank), name, ObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+SORT_RANK_MIGRATION = "backfill_sort_rank"
+
+
+async def backfill_sort_rank() -> int:
+    """Give players uploaded before sort_rank existed their sort key. Returns the number updated.
+
+    The filter is unindexed, so this scans the players collection; a marker document
+    makes later worker starts skip it. Every upload sets sort_rank itself.
+    """
+    if await migrations_col().find_one({"_id": SORT_RANK_MIGRATION}):
+        return 0
+    result = await players_col().update_many(
+        {"sort_rank": {"$exists": False}},
+        [{"$set": {"sort_rank": {"$ifNull": ["$rank", UNRANKED]}}}],
+    )
+    await migrations_col().update_one(
+        {"_id": SORT_RANK_MIGRATION},
+        {"$setOnInsert": {"applied_at": datetime.now(timezone.utc), "modified": result.modified_count}},
+        upsert=True,
+    )
+    return result.modified_count
+
+
+async def available_players(
+    league_name: str,
+    position: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    allowed: Optional[Iterable[str]] = None,
+) -> Tuple[List[PlayerOut], Optional[str]]:
+    """Return one page of the available pool (ranked first, then unranked by name) and the next cursor.
+
+    `allowed`, if given, restricts the page to those positions.
+    """
+    filt: Dict = {"drafted_by": None, "league_name": league_name}
+    if allowed is not None:
+        allowed = set(allowed)
+        if position:
+            allowed &= {position}
+        filt["position"] = {"$in": sorted(allowed)}
+    elif position:
+        filt["position"] = position
+    if after:
+        rank, name, oid = decode_cursor(after)
+        filt["$or"] = [
+            {"sort_rank": {"$gt": rank}},
+            {"sort_rank": rank, "name": {"$gt": name}},
+            {"sort_rank": rank, "name": name, "_id": {"$gt": oid}},
+        ]
+    cursor = players_col().find(filt, AVAILABLE_PROJECTION).sort(AVAILABLE_SORT)
+    if limit:
+        # One extra row tells us whether there is a next page
+        cursor = cursor.limit(limit + 1)
+
+    players: List[PlayerOut] = []
+    last = None
+    async for doc in cursor:
+        if limit and len(players) == limit:
+            return players, encode_cursor(last)
+        players.append(
+            PlayerOut(
+                id=str(doc.get("_id")),
+                name=doc.get("name"),
+                position=doc.get("position"),
+                rank=doc.get("rank"),
+                projection=doc.get("projection"),
+                vor=doc.get("vor"),
+                value_rank=doc.get("value_rank"),
+            )
+        )
+        last = doc
+    return players, None
+
+
+async def drafted_players(league_name: str, limit: int) -> List[DraftedPlayerOut]:
+    # Newest picks first: an indexed tail read of the pick log
+    out: List[DraftedPlayerOut] = []
+    cursor = picks_col().find({"league_name": league_name}).sort("overall", -1).limit(limit)
+    async for entry in cursor:
+        out.append(
+            DraftedPlayerOut(
+                id=str(entry.get("player_id")),
+                name=entry.get("player_name"),
+                position=entry.get("position"),
+                drafted_by=entry.get("team_name"),
+                drafted_at=entry.get("picked_at"),
+                overall=entry.get("overall"),
+                round=entry.get("round"),
+                auto=bool(entry.get("auto", False)),
+            )
+        )
+    if out:
+        return out
+
+    # Leagues drafted before the pick log existed
+    col = players_col()
+    # Only players that have been drafted in this league. Sort newest first by drafted_at (missing last), then _id.
+    cursor = (
+        col.find({"drafted_by": {"$ne": None}, "league_name": league_name})
+        .sort([("drafted_at", -1), ("_id", -1)])
+        .limit(limit)
+    )
+    async for doc in cursor:
+        out.append(
+            DraftedPlayerOut(
+                id=str(doc.get("_id")),
+                name=doc.get("name"),
+                position=doc.get("position"),
+                drafted_by=str(doc.get("drafted_by")),
+                drafted_at=doc.get("drafted_at"),
+            )
+        )
+    return out
+
+
+async def team_roster(league_name: str, team_name: str) -> TeamRosterOut:
+    col = players_col()
+    cursor = col.find({"drafted_by": team_name, "league_name": league_name}).sort("name", 1)
+    players: List[PlayerOut] = []
+    counts = Counter()
+    async for doc in cursor:
+        players.append(
+            PlayerOut(
+                id=str(doc.get("_id")),
+                name=doc.get("name"),
+                position=doc.get("position"),
+                drafted_by=doc.get("drafted_by"),
+            )
+        )
+        counts[doc.get("position")] += 1
+    return TeamRosterOut(team_name=team_name, players=players, counts_by_position=dict(counts))
+
+
+async def all_rosters(league_name: str) -> List[TeamRosterOut]:
+    """Every team's roster and position counts, from one aggregation over drafted players."""
+    pipeline = [
+        {"$match": {"league_name": league_name, "drafted_by": {"$ne": None}}},
+        {"$sort": {"name": 1}},
+        {
+            "$group": {
+                "_id": "$drafted_by",
+                "players": {"$push": {"id": {"$toString": "$_id"}, "name": "$name", "position": "$position", "rank": "$rank"}},
+            }
+        },
+    ]
+    rosters: Dict[str, List[Dict]] = {}
+    async for doc in players_col().aggregate(pipeline):
+        rosters[doc["_id"]] = doc["players"]
+    # Teams that have not picked yet still get a (empty) column on the board
+    names = sorted(set(await team_names(league_name)) | set(rosters))
+    out: List[TeamRosterOut] = []
+    for name in names:
+        players = rosters.get(name, [])
+        out.append(
+            TeamRosterOut(
+                team_name=name,
+                players=[PlayerOut(drafted_by=name, **p) for p in players],
+                counts_by_position=dict(Counter(p["position"] for p in players)),
+            )
+        )
+    return out
+
+
+async def team_names(league_name: str) -> List[str]:
+    # Return all team names registered to this league
+    col = teams_col()
+    names: List[str] = []
+    cursor = col.find({"league_name": league_name}, {"team_name": 1}).sort("team_name", 1)
+    async for doc in cursor:
+        n = doc.get("team_name")
+        if n:
+            names.append(n)
+    return names
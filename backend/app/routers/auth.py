@@ -1,11 +1,14 @@
+import math
 import os
 from datetime import datetime, timezone
-import bcrypt
 from fastapi import APIRouter, HTTPException
 from dotenv import load_dotenv
 
+from .. import events
+from ..archive import ensure_restored
 from ..auth import create_access_token
 from ..db import teams_col, leagues_col, config_col
+from ..passwords import hash_password, login_throttle, verify_password
 from ..schemas import LoginRequest, TokenResponse, LeagueCreateRequest
 
 load_dotenv()
@@ -25,12 +28,13 @@ async def create_league(body: LeagueCreateRequest):
     if existing:
         raise HTTPException(status_code=409, detail="League already exists")
 
-    pw_hash = bcrypt.hashpw(body.league_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    pw_hash = await hash_password(body.league_password)
     await lcol.insert_one({
         "_id": league_name,
         "password_hash": pw_hash,
         "admin_team_name": team_name,
         "created_at": datetime.now(timezone.utc).isoformat(),
+        "version": 0,
     })
 
     # Create admin team
@@ -52,8 +56,19 @@ async def login(body: LoginRequest):
     if not ldoc:
         raise HTTPException(status_code=404, detail="League not found")
 
-    if not bcrypt.checkpw(body.league_password.encode("utf-8"), ldoc["password_hash"].encode("utf-8")):
+    # Throttled attempts are rejected before paying for a bcrypt check
+    retry_after = login_throttle.retry_after(league_name)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed logins for this league; try again shortly",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    if not await verify_password(body.league_password, ldoc["password_hash"]):
+        login_throttle.record_failure(league_name)
         raise HTTPException(status_code=401, detail="Invalid league password")
+    # Finished drafts may have been archived; bring them back for viewing
+    await ensure_restored(league_name)
 
     # Ensure team exists; auto-add if not (unless draft already started)
     tcol = teams_col()
@@ -64,6 +79,7 @@ async def login(body: LoginRequest):
             raise HTTPException(status_code=403, detail="Draft already started. No new teams can be added to this league.")
         await tcol.insert_one({"team_name": team_name, "league_name": league_name, "is_admin": False})
         team = {"team_name": team_name, "league_name": league_name, "is_admin": False}
+        await events.notify(league_name, "teams", team_name=team_name)
 
     is_admin = bool(team.get("is_admin"))
     token = create_access_token({"team_name": team_name, "league_name": league_name, "is_admin": is_admin})
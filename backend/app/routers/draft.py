@@ -1,18 +1,52 @@
-from typing import Dict
-from datetime import datetime
+import asyncio
+import os
+import re
+import zlib
+from typing import List, Literal, Optional
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from ..auth import get_current_team, get_current_league, get_current_admin
-from ..db import config_col, players_col
-from ..schemas import DraftConfigIn, DraftPickIn, DraftStateOut, PlayerOut
+from .. import events, export
+from ..archive import ensure_writable, get_readable_league, restored_version_doc
+from ..auth import get_current_team, get_current_league, get_current_admin, get_stream_league
+from ..cache import VersionedCache
+from ..db import config_col, players_col, teams_col
+from ..mockdraft import process_pool, simulate_draft
+from ..picks import commit_pick, next_pick_deadline, replay_pick_log, team_eligible_positions, undo_last_pick
+from ..pool import pool_cache, value_ranked
+from ..queries import (
+    AVAILABLE_PROJECTION,
+    drafted_players,
+    draft_state,
+    get_config_doc,
+    team_names,
+    team_roster,
+)
+from ..rules import snake_team
+from ..scheduler import pick_clock
+from ..singleflight import reads
+from ..schemas import (
+    DraftConfigIn,
+    DraftPickIn,
+    DraftQueueIn,
+    DraftSnapshotOut,
+    DraftStateOut,
+    PlayerOut,
+    SimulateIn,
+    SimulationOut,
+)
+from ..value import replacement_settings, store_value_ranks
 
 router = APIRouter()
 
+# Seconds between SSE keepalive comments; keeps proxies from closing idle streams
+EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", "15"))
 
-async def _get_config_doc(league_name: str) -> Dict | None:
-    return await config_col().find_one({"_id": f"config:{league_name}"})
+# League-wide snapshot parts and per-team rosters, keyed by league version
+_snapshot_cache = VersionedCache()
 
 
 @router.post("/config")
@@ -24,6 +58,7 @@ async def set_config(
 ):
     if not is_admin:
         raise HTTPException(status_code=403, detail="Admin only")
+    await ensure_writable(league_name)
     # Upsert single config doc
     doc = {
         "_id": f"config:{league_name}",
@@ -31,36 +66,21 @@ async def set_config(
         "draft_order": body.draft_order,
         "current_pick_index": 0,
         "league_name": league_name,
+        "pick_seconds": body.pick_seconds,
+        "pick_deadline": None,
     }
-    await config_col().replace_one({"_id": doc["_id"]}, doc, upsert=True)
+    previous = await config_col().find_one_and_replace({"_id": doc["_id"]}, doc, upsert=True)
+    # Replacement levels depend on the number of teams and the position caps
+    if replacement_settings(previous) != replacement_settings(doc):
+        await store_value_ranks(league_name)
+    pick_clock.cancel(league_name)
+    await events.notify(league_name, "config")
     return {"ok": True}
 
 
 @router.get("/state", response_model=DraftStateOut)
-async def get_state(team_name: str = Depends(get_current_team), league_name: str = Depends(get_current_league)):
-    cfg = await _get_config_doc(league_name)
-    if not cfg:
-        return DraftStateOut(position_limits={}, draft_order=[], current_pick_index=0, current_team=None, draft_started=False)
-    idx = cfg.get("current_pick_index", 0)  # total picks made so far (0-based)
-    order = cfg.get("draft_order", [])
-    n = len(order)
-    if n == 0:
-        current_team = None
-    else:
-        round_num = idx // n
-        pick_in_round = idx % n
-        if round_num % 2 == 0:
-            sel = pick_in_round
-        else:
-            sel = n - 1 - pick_in_round
-        current_team = order[sel]
-    return DraftStateOut(
-        position_limits=cfg.get("position_limits", {}),
-        draft_order=order,
-        current_pick_index=idx,
-        current_team=current_team,
-        draft_started=bool(cfg.get("draft_started", False)),
-    )
+async def get_state(team_name: str = Depends(get_current_team), league_name: str = Depends(get_readable_league)):
+    return draft_state(await reads.do(("config", league_name), lambda: get_config_doc(league_name)))
 
 
 @router.post("/start")
@@ -71,16 +91,25 @@ async def start_draft(
 ):
     if not is_admin:
         raise HTTPException(status_code=403, detail="Admin only")
-    cfg = await _get_config_doc(league_name)
+    await ensure_writable(league_name)
+    cfg = await get_config_doc(league_name)
     if not cfg:
         raise HTTPException(status_code=400, detail="Draft not configured")
-    await config_col().update_one({"_id": f"config:{league_name}"}, {"$set": {"draft_started": True}})
+    # Start the clock for the pick that is now on the board
+    deadline = next_pick_deadline({**cfg, "draft_started": True}, cfg.get("current_pick_index", 0))
+    await config_col().update_one(
+        {"_id": f"config:{league_name}"},
+        {"$set": {"draft_started": True, "pick_deadline": deadline}},
+    )
+    pick_clock.schedule(league_name, cfg.get("current_pick_index", 0), deadline)
+    await events.notify(league_name, "start", current_pick_index=cfg.get("current_pick_index", 0), pick_deadline=deadline)
     return {"ok": True, "draft_started": True}
 
 
 @router.post("/pick")
 async def make_pick(body: DraftPickIn, team_name: str = Depends(get_current_team), league_name: str = Depends(get_current_league)):
-    cfg = await _get_config_doc(league_name)
+    await ensure_writable(league_name)
+    cfg = await get_config_doc(league_name)
     if not cfg:
         raise HTTPException(status_code=400, detail="Draft not configured")
 
@@ -90,81 +119,223 @@ async def make_pick(body: DraftPickIn, team_name: str = Depends(get_current_team
         raise HTTPException(status_code=400, detail="No draft order configured")
 
     # Determine current team using snake order
-    n = len(order)
-    round_num = idx // n
-    pick_in_round = idx % n
-    if round_num % 2 == 0:
-        sel = pick_in_round
-    else:
-        sel = n - 1 - pick_in_round
-    current_team = order[sel]
+    current_team = snake_team(order, idx)
     if team_name != current_team:
         raise HTTPException(status_code=403, detail=f"It's {current_team}'s turn")
 
-    # Validate player is available
-    pcol = players_col()
-    pid = body.player_id
-    try:
-        oid = ObjectId(pid)
-    except Exception:
+    next_idx = idx + 1
+    deadline = next_pick_deadline(cfg, next_idx)
+    player = await commit_pick(cfg, team_name, body.player_id, deadline)
+    pick_clock.schedule(league_name, next_idx, deadline)
+
+    await events.notify(
+        league_name,
+        "pick",
+        team_name=team_name,
+        player_id=str(player["_id"]),
+        current_pick_index=next_idx,
+        pick_deadline=deadline,
+    )
+    return {"ok": True}
+
+
+@router.post("/undo")
+async def undo_pick(
+    team_name: str = Depends(get_current_team),
+    league_name: str = Depends(get_current_league),
+    is_admin: bool = Depends(get_current_admin),
+):
+    # Commissioner correction: take back the most recent pick and reopen its slot
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
+    await ensure_writable(league_name)
+    cfg = await get_config_doc(league_name)
+    if not cfg:
+        raise HTTPException(status_code=400, detail="Draft not configured")
+    # The reopened slot is always before the end of the draft
+    deadline = next_pick_deadline(cfg, max(cfg.get("current_pick_index", 0) - 1, 0))
+    undone = await undo_last_pick(cfg, deadline)
+    if not undone:
+        raise HTTPException(status_code=400, detail="No picks to undo")
+    idx = undone["overall"] - 1
+    pick_clock.schedule(league_name, idx, deadline)
+    await events.notify(
+        league_name,
+        "undo",
+        team_name=undone["team_name"],
+        player_id=str(undone["player_id"]),
+        current_pick_index=idx,
+        pick_deadline=deadline,
+    )
+    return {"ok": True, "current_pick_index": idx}
+
+
+@router.post("/replay")
+async def replay_picks(
+    team_name: str = Depends(get_current_team),
+    league_name: str = Depends(get_current_league),
+    is_admin: bool = Depends(get_current_admin),
+):
+    # Rebuild rosters, counters and the pick index from the pick log
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
+    await ensure_writable(league_name)
+    cfg = await get_config_doc(league_name)
+    if not cfg:
+        raise HTTPException(status_code=400, detail="Draft not configured")
+    replayed, deadline = await replay_pick_log(cfg)
+    pick_clock.schedule(league_name, replayed, deadline)
+    await events.notify(league_name, "replay", current_pick_index=replayed, pick_deadline=deadline)
+    return {"ok": True, "current_pick_index": replayed}
+
+
+@router.post("/simulate", response_model=SimulationOut)
+async def simulate(
+    body: SimulateIn,
+    team_name: str = Depends(get_current_team),
+    league_name: str = Depends(get_readable_league),
+):
+    # Mock the rest of the draft from the current board and report, for each of the
+    # caller's remaining picks, how likely the top players are to still be there
+    cfg = await get_config_doc(league_name)
+    if not cfg or not cfg.get("draft_order"):
+        raise HTTPException(status_code=400, detail="Draft not configured")
+    if team_name not in cfg["draft_order"]:
+        raise HTTPException(status_code=400, detail="Your team is not in the draft order")
+    entry = await pool_cache.get(league_name)
+    team_counts = {}
+    async for doc in teams_col().find({"league_name": league_name}, {"team_name": 1, "position_counts": 1}):
+        team_counts[doc["team_name"]] = doc.get("position_counts") or {}
+    # CPU-bound: orchestrate from a thread so the event loop keeps serving
+    return await run_in_threadpool(
+        simulate_draft,
+        entry.players,
+        cfg["draft_order"],
+        cfg.get("position_limits", {}) or {},
+        team_name,
+        current_pick_index=cfg.get("current_pick_index", 0),
+        team_counts=team_counts,
+        simulations=body.simulations,
+        noise=body.noise,
+        players_per_pick=body.players_per_pick,
+        seed=body.seed,
+        executor=process_pool(),
+    )
+
+
+@router.get("/export")
+async def export_draft(
+    format: Literal["csv", "json", "ndjson"] = Query("csv"),
+    league_name: str = Depends(get_readable_league),
+):
+    # Every pick in the league, streamed
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", league_name) or "league"
+    return StreamingResponse(
+        export.render(export.pick_rows(league_name), format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{safe_name}-draft.{format}"'},
+    )
+
+
+@router.get("/queue", response_model=List[PlayerOut])
+async def get_queue(team_name: str = Depends(get_current_team), league_name: str = Depends(get_readable_league)):
+    # The caller's saved autodraft queue, in order, minus players already drafted
+    team = await teams_col().find_one({"team_name": team_name, "league_name": league_name}, {"queue": 1})
+    ids = [ObjectId(pid) for pid in (team or {}).get("queue", []) if ObjectId.is_valid(pid)]
+    found = {}
+    async for doc in players_col().find({"_id": {"$in": ids}, "league_name": league_name, "drafted_by": None}, AVAILABLE_PROJECTION):
+        found[doc["_id"]] = doc
+    return [
+        PlayerOut(id=str(oid), name=found[oid].get("name"), position=found[oid].get("position"), rank=found[oid].get("rank"))
+        for oid in ids
+        if oid in found
+    ]
+
+
+@router.put("/queue")
+async def set_queue(body: DraftQueueIn, team_name: str = Depends(get_current_team), league_name: str = Depends(get_current_league)):
+    await ensure_writable(league_name)
+    # Players to try, in order, if this team's pick clock runs out
+    if not all(ObjectId.is_valid(pid) for pid in body.player_ids):
         raise HTTPException(status_code=400, detail="Invalid player id")
+    await teams_col().update_one(
+        {"team_name": team_name, "league_name": league_name},
+        {"$set": {"queue": list(dict.fromkeys(body.player_ids))}},
+    )
+    return {"ok": True}
 
-    player = await pcol.find_one({"_id": oid, "league_name": league_name})
-    if not player:
-        raise HTTPException(status_code=404, detail="Player not found")
-    if player.get("drafted_by"):
-        raise HTTPException(status_code=400, detail="Player already drafted")
 
-    # Enforce position limits, with support for ANY slots
-    position = player.get("position")
-    limits: Dict[str, int] = cfg.get("position_limits", {}) or {}
-    any_limit = int(limits.get("ANY", 0) or 0)
-    pos_limit = limits.get(position)
-    drafted_pos = await pcol.count_documents({"drafted_by": team_name, "position": position, "league_name": league_name})
+@router.get("/snapshot", response_model=DraftSnapshotOut)
+async def get_snapshot(
+    request: Request,
+    response: Response,
+    position: Optional[str] = Query(None),
+    picks_limit: int = Query(10, ge=1, le=100),
+    eligible_only: bool = Query(False),
+    sort: Literal["rank", "value"] = Query("rank"),
+    team_name: str = Depends(get_current_team),
+    league_name: str = Depends(get_current_league),
+):
+    # Everything the draft page needs in one response. The ETag carries the league
+    # version, so an unchanged league answers a conditional GET with a bare 304.
+    version = int((await restored_version_doc(league_name)).get("version", 0) or 0)
+    variant = zlib.crc32(f"{team_name}|{position or ''}|{picks_limit}|{eligible_only:d}|{sort}".encode("utf-8"))
+    etag = f'"{version}-{variant:08x}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    async def build_shared():
+        entry = await pool_cache.get(league_name)
+        if sort == "value":
+            await value_ranked(entry, league_name)
+        return {
+            "state": draft_state(await get_config_doc(league_name)),
+            "available": entry.filtered(position, by_value=sort == "value"),
+            "recent_picks": await drafted_players(league_name, picks_limit),
+            "teams": await team_names(league_name),
+        }
+
+    # Concurrent misses for the same version share one build
+    shared = await _snapshot_cache.get_or_build(("league", league_name, position, picks_limit, sort), version, build_shared)
+    my_team = await _snapshot_cache.get_or_build(
+        ("roster", league_name, team_name), version, lambda: team_roster(league_name, team_name)
+    )
+
+    if eligible_only:
+        positions = {p["position"] for p in shared["available"]}
+        allowed = await team_eligible_positions(league_name, team_name, positions)
+        if allowed is not None:
+            shared = {**shared, "available": [p for p in shared["available"] if p["position"] in allowed]}
+
+    return DraftSnapshotOut(version=version, my_team=my_team, **shared)
 
-    # If specific limit exists and not yet reached, allow immediately
+
+async def _event_stream(request: Request, league_name: str):
+    queue = events.broker.subscribe(league_name)
     try:
-        pos_limit_int = int(pos_limit) if pos_limit is not None else None
-    except (TypeError, ValueError):
-        pos_limit_int = None
-    if pos_limit_int is not None and drafted_pos < pos_limit_int:
-        pass  # allowed
-    else:
-        # Either limit reached or no specific cap exists -> rely on ANY pool
-        if any_limit <= 0:
-            if pos_limit_int is None:
-                raise HTTPException(status_code=400, detail=f"No ANY slots configured and no specific cap for {position}")
-            else:
-                raise HTTPException(status_code=400, detail=f"Roster limit reached for {position}")
-        # Compute ANY usage as excess picks over (per-position cap or 0 if not set)
-        counts_by_pos: Dict[str, int] = {}
-        async for doc in pcol.find({"drafted_by": team_name, "league_name": league_name}, {"position": 1}):
-            p = doc.get("position")
-            counts_by_pos[p] = counts_by_pos.get(p, 0) + 1
-        any_used = 0
-        for p, picked in counts_by_pos.items():
-            if p == "ANY":
-                continue
-            lim_val = limits.get(p)
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        while True:
             try:
-                lim_int = int(lim_val) if lim_val is not None else 0
-            except (TypeError, ValueError):
-                lim_int = 0
-            excess = picked - lim_int
-            if excess > 0:
-                any_used += excess
-        any_remaining = any_limit - any_used
-        if any_remaining <= 0:
-            raise HTTPException(status_code=400, detail=f"No ANY slots remaining")
-
-    # Draft player
-    await pcol.update_one(
-        {"_id": oid, "drafted_by": None, "league_name": league_name},
-        {"$set": {"drafted_by": team_name, "drafted_at": datetime.utcnow()}},
-    )
+                event = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            yield events.format_sse(event)
+    finally:
+        events.broker.unsubscribe(league_name, queue)
 
-    # Advance pick (keep a running total; do not modulo)
-    next_idx = idx + 1
-    await config_col().update_one({"_id": f"config:{league_name}"}, {"$set": {"current_pick_index": next_idx}})
 
-    return {"ok": True}
+@router.get("/events")
+async def draft_events(request: Request, league_name: str = Depends(get_stream_league)):
+    # Server-Sent Events: pick/start/config/players/teams notifications for this league.
+    # Clients refetch on an event instead of polling.
+    return StreamingResponse(
+        _event_stream(request, league_name),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,131 +1,410 @@
 import csv
-from io import StringIO
-from typing import List, Optional
+import io
+import itertools
+import math
+import os
+import zlib
+from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 
+from .. import events
+from ..archive import ensure_restored, ensure_writable, get_readable_league
 from ..auth import get_current_team, get_current_league, get_current_admin
-from ..db import players_col
+from ..db import picks_col, players_col, teams_col
+from ..compression import COMPRESS_MIN_BYTES, negotiate
+from ..encoding import MEDIA_TYPES, encode, encode_players, ensure_format, player_columns
+from ..names import normalize_name
+from ..picks import team_eligible_positions
+from ..pool import pool_cache, value_ranked
+from ..queries import available_players, drafted_players, sort_rank
 from ..schemas import PlayerOut, DraftedPlayerOut
+from ..value import store_value_ranks
 
 router = APIRouter()
 
+# Rows parsed and inserted per round trip
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "500"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+# Cap on per-row problems echoed back in the upload response
+MAX_REPORTED_ERRORS = 100
+# Optional column of projected points, used for value-over-replacement ranking
+PROJECTION_COLUMNS = ("projection", "projected_points", "proj", "fpts", "points")
+
+
+def _upload_size(file: UploadFile) -> int:
+    f = file.file
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    return size
+
+
+def _open_reader(file: UploadFile) -> Tuple[io.TextIOWrapper, csv.DictReader]:
+    # Starlette has already spooled the upload to a temp file; read it lazily from there
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    # Header matching is case-insensitive; extra columns are ignored
+    reader.fieldnames = [(c or "").strip().lower() for c in reader.fieldnames or []]
+    return text, reader
+
+
+def _take_rows(reader: csv.DictReader, n: int) -> List[Tuple[int, Dict[str, str]]]:
+    return [(reader.line_num, row) for row in itertools.islice(reader, n)]
+
+
+class _UploadReport:
+    def __init__(self):
+        self.skipped = 0
+        self.errors: List[Dict] = []
+        # Set once the league's own rows have been written to
+        self.changed = False
+
+    def add(self, line: Optional[int], error: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+
+def _parse_projection(value: Optional[str]) -> Optional[float]:
+    try:
+        projection = float((value or "").strip())
+    except ValueError:
+        return None
+    return projection if math.isfinite(projection) else None
+
+
+async def _valid_rows(
+    reader: csv.DictReader, batch_size: int, report: _UploadReport
+) -> AsyncIterator[List[Tuple[int, str, str, Optional[float]]]]:
+    # Parse one batch off the event loop at a time; yield its (line, name, position, projection) rows
+    projection_col = next((c for c in PROJECTION_COLUMNS if c in reader.fieldnames), None)
+    while True:
+        try:
+            rows = await run_in_threadpool(_take_rows, reader, batch_size)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPException(status_code=400, detail=f"Malformed CSV after line {reader.line_num}: {exc}")
+        if not rows:
+            return
+        batch = []
+        for line, row in rows:
+            name = (row.get("name") or "").strip()
+            position = (row.get("position") or "").strip()
+            if not name:
+                report.add(line, "Missing name")
+            elif not position:
+                report.add(line, "Missing position")
+            else:
+                projection = _parse_projection(row.get(projection_col)) if projection_col else None
+                batch.append((line, name, position, projection))
+        if batch:
+            yield batch
+
+
+def _player_doc(league_name: str, name: str, position: str, rank: int, projection: Optional[float] = None) -> Dict:
+    return {
+        "name": name,
+        "position": position,
+        "drafted_by": None,
+        "league_name": league_name,
+        # Preserve upload order as rank (1-based)
+        "rank": rank,
+        "sort_rank": sort_rank(rank),
+        "projection": projection,
+    }
+
+
+def _staging_league(league_name: str) -> str:
+    # Overwrite uploads are inserted under this key and only moved into the league
+    # once the whole file has parsed, so a bad file never leaves it half replaced
+    return f"__upload__:{ObjectId()}:{league_name}"
+
+
+async def _insert_players(league_name: str, batches, overwrite: bool, report: _UploadReport) -> Dict[str, int]:
+    col = players_col()
+    # Determine starting rank. If overwriting, we reset to 1; otherwise continue after current max.
+    if overwrite:
+        rank_counter = 1
+        target = _staging_league(league_name)
+    else:
+        existing = await col.find_one({"league_name": league_name, "rank": {"$ne": None}}, sort=[("rank", -1)])
+        rank_counter = (existing.get("rank") if existing else 0) + 1
+        target = league_name
+
+    inserted = 0
+    try:
+        async for batch in batches:
+            docs = []
+            for _, name, position, projection in batch:
+                docs.append(_player_doc(target, name, position, rank_counter, projection))
+                rank_counter += 1
+            try:
+                result = await col.insert_many(docs, ordered=False)
+                inserted += len(result.inserted_ids)
+            except BulkWriteError as exc:
+                inserted += exc.details.get("nInserted", 0)
+                for err in exc.details.get("writeErrors", []):
+                    report.add(batch[err["index"]][0], err.get("errmsg", "Insert failed"))
+            if inserted and not overwrite:
+                report.changed = True
+        if not inserted:
+            raise HTTPException(status_code=400, detail="No valid players found in CSV")
+    except BaseException:
+        if overwrite:
+            await col.delete_many({"league_name": target})
+        raise
+
+    if overwrite:
+        # Swap the staged players in; every roster is empty again, so reset the
+        # per-team pick counters to match
+        report.changed = True
+        await col.delete_many({"league_name": league_name})
+        await picks_col().delete_many({"league_name": league_name})
+        await teams_col().update_many({"league_name": league_name}, {"$set": {"position_counts": {}, "pick_count": 0}})
+        await col.update_many({"league_name": target}, {"$set": {"league_name": league_name}})
+    return {"inserted": inserted}
+
+
+def _merge_key(name: str, position: str) -> str:
+    return f"{normalize_name(name)}|{position.strip().upper()}"
+
+
+async def _flush_ops(ops: List, lines: List[Optional[int]], report: _UploadReport) -> int:
+    # Returns how many players the batch deleted
+    if not ops:
+        return 0
+    report.changed = True
+    try:
+        deleted = (await players_col().bulk_write(ops, ordered=False)).deleted_count
+    except BulkWriteError as exc:
+        deleted = exc.details.get("nRemoved", 0)
+        for err in exc.details.get("writeErrors", []):
+            report.add(lines[err["index"]], err.get("errmsg", "Write failed"))
+    ops.clear()
+    lines.clear()
+    return deleted
+
+
+async def _merge_players(league_name: str, batches, batch_size: int, report: _UploadReport) -> Dict[str, int]:
+    # Diff the upload against the league's players by normalized name + position and
+    # write only what changed. Drafted players are never removed and keep drafted_by.
+    existing: Dict[str, Dict] = {}
+    duplicates: List = []
+    cursor = players_col().find({"league_name": league_name}, {"name": 1, "position": 1, "rank": 1, "projection": 1, "drafted_by": 1})
+    async for doc in cursor:
+        key = _merge_key(doc.get("name") or "", doc.get("position") or "")
+        kept = existing.get(key)
+        if kept is None:
+            existing[key] = doc
+            continue
+        # Duplicates left by earlier appends: keep the drafted copy, drop undrafted extras
+        if doc.get("drafted_by") and not kept.get("drafted_by"):
+            existing[key], doc = doc, kept
+        if not doc.get("drafted_by"):
+            duplicates.append(doc["_id"])
+
+    counts = {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    seen = set()
+    ops: List = []
+    lines: List[Optional[int]] = []
+    rank = 1
+    async for batch in batches:
+        for line, name, position, projection in batch:
+            key = _merge_key(name, position)
+            if key in seen:
+                report.add(line, "Duplicate player in upload")
+                continue
+            seen.add(key)
+            doc = existing.get(key)
+            op = None
+            if doc is None:
+                op = InsertOne(_player_doc(league_name, name, position, rank, projection))
+                counts["inserted"] += 1
+            elif doc.get("rank") != rank or doc.get("name") != name or doc.get("projection") != projection:
+                # Safe for players drafted since the read: drafted_by is left as it is
+                op = UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"name": name, "rank": rank, "sort_rank": sort_rank(rank), "projection": projection}},
+                )
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+            if op is not None:
+                ops.append(op)
+                lines.append(line)
+            rank += 1
+        if len(ops) >= batch_size:
+            await _flush_ops(ops, lines, report)
+
+    # An upload with no valid rows must not empty the league
+    if not seen:
+        raise HTTPException(status_code=400, detail="No valid players found in CSV")
+
+    # drafted_by was read before the upload was parsed; the filter keeps anyone picked since
+    stale = [doc["_id"] for key, doc in existing.items() if key not in seen and not doc.get("drafted_by")]
+    for oid in stale + duplicates:
+        ops.append(DeleteOne({"_id": oid, "drafted_by": None}))
+        lines.append(None)
+        if len(ops) >= batch_size:
+            counts["removed"] += await _flush_ops(ops, lines, report)
+    counts["removed"] += await _flush_ops(ops, lines, report)
+    return counts
+
 
 @router.post("/upload")
 async def upload_players(
     file: UploadFile = File(...),
     overwrite: bool = Query(True),
+    mode: Optional[Literal["append", "overwrite", "merge"]] = Query(None),
+    batch_size: int = Query(UPLOAD_BATCH_SIZE, ge=1, le=10000),
     team_name: str = Depends(get_current_team),
     league_name: str = Depends(get_current_league),
     is_admin: bool = Depends(get_current_admin),
 ):
     if not is_admin:
         raise HTTPException(status_code=403, detail="Admin only")
+    await ensure_writable(league_name)
     # Read the uploaded CSV file
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Please upload a CSV file")
+    if await run_in_threadpool(_upload_size, file) > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"CSV larger than {UPLOAD_MAX_BYTES} bytes")
 
-    content = (await file.read()).decode("utf-8")
-    reader = csv.DictReader(StringIO(content))
+    try:
+        text, reader = await run_in_threadpool(_open_reader, file)
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="Could not read CSV header")
     required_cols = {"name", "position"}
-    if not required_cols.issubset({c.lower() for c in reader.fieldnames or []}):
+    if not required_cols.issubset(reader.fieldnames):
+        text.detach()
         raise HTTPException(status_code=400, detail="CSV must have 'name' and 'position' headers")
 
-    docs = []
-    col = players_col()
-    # Determine starting rank. If overwriting, we reset to 1; otherwise continue after current max.
-    if overwrite:
-        rank_counter = 1
-    else:
-        existing = await col.find_one({"league_name": league_name, "rank": {"$ne": None}}, sort=[("rank", -1)])
-        rank_counter = (existing.get("rank") if existing else 0) + 1
-    for row in reader:
-        name = (row.get("name") or row.get("Name") or "").strip()
-        position = (row.get("position") or row.get("Position") or "").strip()
-        if name and position:
-            docs.append({
-                "name": name,
-                "position": position,
-                "drafted_by": None,
-                "league_name": league_name,
-                # Preserve upload order as rank (1-based)
-                "rank": rank_counter,
-            })
-            rank_counter += 1
-
-    if not docs:
-        raise HTTPException(status_code=400, detail="No valid players found in CSV")
-
-    if overwrite:
-        await col.delete_many({"league_name": league_name})
-
-    if docs:
-        await col.insert_many(docs)
+    # `mode` supersedes the older overwrite flag
+    mode = mode or ("overwrite" if overwrite else "append")
+    report = _UploadReport()
+    try:
+        batches = _valid_rows(reader, batch_size, report)
+        if mode == "merge":
+            result = await _merge_players(league_name, batches, batch_size, report)
+        else:
+            result = await _insert_players(league_name, batches, mode == "overwrite", report)
+    except HTTPException as exc:
+        if not report.changed:
+            raise
+        # Append and merge write as they go: publish what already landed and say so
+        await events.notify(league_name, "players", mode=mode, partial=True)
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=f"{exc.detail}. Rows before this point were already saved to the league",
+        )
+    except BaseException:
+        if report.changed:
+            await events.notify(league_name, "players", mode=mode, partial=True)
+        raise
+    finally:
+        text.detach()
 
-    return {"inserted": len(docs)}
+    result["value_ranked"] = await store_value_ranks(league_name)
+    await events.notify(league_name, "players", mode=mode, **result)
+    return {**result, "skipped": report.skipped, "errors": report.errors}
 
 
 @router.get("/available", response_model=List[PlayerOut])
 async def list_available_players(
+    request: Request,
+    response: Response,
     position: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = Query(None),
+    since: Optional[int] = Query(None, ge=0),
+    eligible_only: bool = Query(False),
+    sort: Literal["rank", "value"] = Query("rank"),
+    format: Literal["json", "columns", "msgpack"] = Query("json"),
     team_name: str = Depends(get_current_team),
     league_name: str = Depends(get_current_league),
 ):
-    col = players_col()
-    base_filter = {"drafted_by": None, "league_name": league_name}
-    if position:
-        base_filter["position"] = position
-
-    # Return ranked players first (ascending by rank), then unranked by name
-    players: List[PlayerOut] = []
-    ranked_cursor = col.find({**base_filter, "rank": {"$ne": None}}).sort("rank", 1)
-    async for doc in ranked_cursor:
-        players.append(
-            PlayerOut(
-                id=str(doc.get("_id")),
-                name=doc.get("name"),
-                position=doc.get("position"),
-                drafted_by=doc.get("drafted_by"),
-                rank=doc.get("rank"),
-            )
-        )
-    unranked_cursor = col.find({**base_filter, "rank": None}).sort("name", 1)
-    async for doc in unranked_cursor:
-        players.append(
-            PlayerOut(
-                id=str(doc.get("_id")),
-                name=doc.get("name"),
-                position=doc.get("position"),
-                drafted_by=doc.get("drafted_by"),
-                rank=doc.get("rank"),
-            )
-        )
-    return players
+    # `format=columns` returns parallel arrays per field instead of one object per
+    # player; `format=msgpack` the same objects as MessagePack.
+    # `sort=value` orders by value over replacement against the starter slots teams
+    # still have open (recomputed after every pick); it is only served from the pool cache.
+    # `eligible_only` drops positions the caller can no longer roster (same rules as
+    # /draft/pick), judged from the team's cached position counters.
+    # With `limit`, pages come straight from Mongo: pass the X-Next-Cursor header of
+    # one page as `after` to fetch the next.
+    ensure_format(format)
+    if limit or after:
+        # Pages come straight from Mongo; pool_cache.get restores for the path below
+        await ensure_restored(league_name)
+        if sort == "value":
+            raise HTTPException(status_code=400, detail="sort=value cannot be combined with limit/after")
+        allowed = None
+        if eligible_only:
+            positions = await players_col().distinct("position", {"league_name": league_name, "drafted_by": None})
+            allowed = await team_eligible_positions(league_name, team_name, positions)
+        players, next_cursor = await available_players(league_name, position, limit, after, allowed)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        if format == "json":
+            response.headers.update(headers)
+            return players
+        return Response(encode_players(jsonable_encoder(players), format), media_type=MEDIA_TYPES[format], headers=headers)
+
+    # Otherwise the whole pool is served from the per-league cache. X-Pool-Version
+    # names the version returned; pass it back as `since` to get only what changed:
+    # {"version", "full", "removed": [ids], "added": [players]}. `full` means the
+    # diff was unavailable and `added` is the entire pool. Eligibility and live value
+    # can change for players that stayed in the pool, so those requests are always full.
+    entry = await pool_cache.get(league_name)
+    allowed = await team_eligible_positions(league_name, team_name, entry.positions) if eligible_only else None
+    by_value = sort == "value"
+    if by_value:
+        await value_ranked(entry, league_name)
+    headers = {"X-Pool-Version": str(entry.version), "Cache-Control": "no-cache"}
+    if since is not None:
+        changes = None if eligible_only or by_value else pool_cache.changes_since(league_name, since, position)
+        if changes is None:
+            changes = {"version": entry.version, "full": True, "removed": [], "added": entry.filtered(position, allowed, by_value)}
+        if format == "columns":
+            changes = {**changes, "added": player_columns(changes["added"])}
+        return Response(encode(changes, format), media_type=MEDIA_TYPES[format], headers=headers)
+
+    variant = zlib.crc32(
+        f"{position or ''}|{','.join(sorted(allowed)) if allowed is not None else '*'}|{sort}|{format}".encode("utf-8")
+    )
+    headers["ETag"] = f'"pool-{entry.version}-{variant:08x}"'
+    headers["Vary"] = "Accept-Encoding"
+    if headers["ETag"] in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers=headers)
+    # Compressed here rather than by CompressionMiddleware so the result is cached with the pool
+    body = entry.body(position, allowed, by_value, format)
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding and len(body) >= COMPRESS_MIN_BYTES:
+        headers["Content-Encoding"] = encoding
+        body = entry.compressed(encoding, position, allowed, by_value, format)
+    return Response(body, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@router.get("/search", response_model=List[PlayerOut])
+async def search_players(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    position: Optional[str] = Query(None),
+    team_name: str = Depends(get_current_team),
+    league_name: str = Depends(get_current_league),
+):
+    # Typeahead over available players' names, best-ranked first; served from memory
+    entry = await pool_cache.get(league_name)
+    return entry.name_index.search(q, limit, position)
 
 
 @router.get("/drafted", response_model=List[DraftedPlayerOut])
 async def list_drafted_players(
     limit: int = Query(10, ge=1, le=100),
     team_name: str = Depends(get_current_team),
-    league_name: str = Depends(get_current_league),
+    league_name: str = Depends(get_readable_league),
 ):
-    col = players_col()
-    # Only players that have been drafted in this league. Sort newest first by drafted_at (missing last), then _id.
-    cursor = (
-        col.find({"drafted_by": {"$ne": None}, "league_name": league_name})
-        .sort([("drafted_at", -1), ("_id", -1)])
-        .limit(limit)
-    )
-    out: List[DraftedPlayerOut] = []
-    async for doc in cursor:
-        out.append(
-            DraftedPlayerOut(
-                id=str(doc.get("_id")),
-                name=doc.get("name"),
-                position=doc.get("position"),
-                drafted_by=str(doc.get("drafted_by")),
-                drafted_at=doc.get("drafted_at"),
-            )
-        )
-    return out
+    return await drafted_players(league_name, limit)
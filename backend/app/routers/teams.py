@@ -1,65 +1,68 @@
-from collections import Counter
-from typing import List
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 
+from ..archive import get_readable_league, restored_version_doc
 from ..auth import get_current_team, get_current_league
-from ..db import players_col, teams_col
-from ..schemas import PlayerOut, TeamRosterOut
+from ..cache import VersionedCache
+from ..encoding import MEDIA_TYPES, encode, ensure_format, player_columns
+from ..queries import all_rosters, team_names, team_roster
+from ..schemas import TeamRosterOut
 
 router = APIRouter()
 
+# Draft boards keyed by league version
+_board_cache = VersionedCache(max_entries=256)
+
 
 @router.get("/list", response_model=List[str])
-async def list_teams(team_name: str = Depends(get_current_team), league_name: str = Depends(get_current_league)):
-    # Return all team names registered to this league
-    col = teams_col()
-    names: List[str] = []
-    cursor = col.find({"league_name": league_name}, {"team_name": 1}).sort("team_name", 1)
-    async for doc in cursor:
-        n = doc.get("team_name")
-        if n:
-            names.append(n)
-    return names
+async def list_teams(team_name: str = Depends(get_current_team), league_name: str = Depends(get_readable_league)):
+    return await team_names(league_name)
 
 @router.get("/me", response_model=TeamRosterOut)
-async def my_team(team_name: str = Depends(get_current_team), league_name: str = Depends(get_current_league)):
-    col = players_col()
-    cursor = col.find({"drafted_by": team_name, "league_name": league_name}).sort("name", 1)
-    players: List[PlayerOut] = []
-    counts = Counter()
-    async for doc in cursor:
-        players.append(
-            PlayerOut(
-                id=str(doc.get("_id")),
-                name=doc.get("name"),
-                position=doc.get("position"),
-                drafted_by=doc.get("drafted_by"),
-            )
-        )
-        counts[doc.get("position")] += 1
-    return TeamRosterOut(team_name=team_name, players=players, counts_by_position=dict(counts))
+async def my_team(team_name: str = Depends(get_current_team), league_name: str = Depends(get_readable_league)):
+    return await team_roster(league_name, team_name)
+
+
+@router.get("/rosters", response_model=List[TeamRosterOut])
+async def list_rosters(
+    request: Request,
+    response: Response,
+    format: Literal["json", "columns", "msgpack"] = Query("json"),
+    team_name: str = Depends(get_current_team),
+    league_name: str = Depends(get_current_league),
+):
+    # The whole draft board: every team's roster and position counts in one call.
+    # `format=columns` gives each roster's players as parallel arrays per field,
+    # `format=msgpack` the board as MessagePack.
+    ensure_format(format)
+    version = int((await restored_version_doc(league_name)).get("version", 0) or 0)
+    etag = f'"board-{version}-{format}"' if format != "json" else f'"board-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    rosters = await _board_cache.get_or_build(league_name, version, lambda: all_rosters(league_name))
+    if format == "json":
+        return rosters
+
+    async def build_encoded():
+        board = jsonable_encoder(rosters)
+        if format == "columns":
+            board = [{**r, "players": player_columns(r["players"])} for r in board]
+        return encode(board, format)
+
+    body = await _board_cache.get_or_build((league_name, format), version, build_encoded)
+    return Response(body, media_type=MEDIA_TYPES[format], headers=headers)
 
 
 @router.get("/by_name/{target_team}", response_model=TeamRosterOut)
 async def team_by_name(
     target_team: str,
     team_name: str = Depends(get_current_team),
-    league_name: str = Depends(get_current_league),
+    league_name: str = Depends(get_readable_league),
 ):
     # Auth ensures caller is in a league; we scope query to the same league
-    col = players_col()
-    cursor = col.find({"drafted_by": target_team, "league_name": league_name}).sort("name", 1)
-    players: List[PlayerOut] = []
-    counts = Counter()
-    async for doc in cursor:
-        players.append(
-            PlayerOut(
-                id=str(doc.get("_id")),
-                name=doc.get("name"),
-                position=doc.get("position"),
-                drafted_by=doc.get("drafted_by"),
-            )
-        )
-        counts[doc.get("position")] += 1
-    return TeamRosterOut(team_name=target_team, players=players, counts_by_position=dict(counts))
+    return await team_roster(league_name, target_team)
@@ -0,0 +1,68 @@
+from typing import Dict, Iterable, List, Optional
+
+# Pure draft rules shared by manual picks, autodraft and eligibility filtering.
+
+
+def snake_team(order: List[str], idx: int) -> Optional[str]:
+    # idx is the total number of picks made so far (0-based)
+    n = len(order)
+    if n == 0:
+        return None
+    round_num = idx // n
+    pick_in_round = idx % n
+    if round_num % 2 == 0:
+        sel = pick_in_round
+    else:
+        sel = n - 1 - pick_in_round
+    return order[sel]
+
+
+def parse_limit(value) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def draft_complete(cfg: Optional[Dict], pick_index: Optional[int] = None) -> bool:
+    """True once every roster slot in the league has been filled (by `pick_index`, if given)."""
+    if not cfg or not cfg.get("draft_started"):
+        return False
+    roster_size = sum(parse_limit(v) or 0 for v in (cfg.get("position_limits") or {}).values())
+    total = roster_size * len(cfg.get("draft_order") or [])
+    idx = cfg.get("current_pick_index", 0) if pick_index is None else pick_index
+    return total > 0 and idx >= total
+
+
+def any_slots_used(counts: Dict[str, int], limits: Dict[str, int]) -> int:
+    # ANY usage is the excess of picks over each position's cap (0 if not set)
+    used = 0
+    for position, picked in counts.items():
+        if position == "ANY":
+            continue
+        excess = picked - (parse_limit(limits.get(position)) or 0)
+        if excess > 0:
+            used += excess
+    return used
+
+
+def pick_violation(position: str, counts: Dict[str, int], limits: Dict[str, int]) -> Optional[str]:
+    """Return why a team with `counts` cannot draft `position`, or None if it can."""
+    any_limit = parse_limit(limits.get("ANY")) or 0
+    pos_limit = parse_limit(limits.get(position))
+    # If specific limit exists and not yet reached, allow immediately
+    if pos_limit is not None and counts.get(position, 0) < pos_limit:
+        return None
+    # Either limit reached or no specific cap exists -> rely on ANY pool
+    if any_limit <= 0:
+        if pos_limit is None:
+            return f"No ANY slots configured and no specific cap for {position}"
+        return f"Roster limit reached for {position}"
+    if any_limit - any_slots_used(counts, limits) <= 0:
+        return "No ANY slots remaining"
+    return None
+
+
+def eligible_positions(positions: Iterable[str], counts: Dict[str, int], limits: Dict[str, int]) -> List[str]:
+    """The subset of `positions` a team with `counts` may still draft."""
+    return [p for p in positions if pick_violation(p, counts, limits) is None]
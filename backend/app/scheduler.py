@@ -0,0 +1,136 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from . import events
+from .db import config_col
+from .picks import autodraft, next_pick_deadline
+from .queries import get_config_doc
+from .rules import snake_team
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(deadline: datetime) -> float:
+    # Deadlines are stored as naive UTC, like drafted_at
+    if deadline.tzinfo is None:
+        deadline = deadline.replace(tzinfo=timezone.utc)
+    return deadline.timestamp()
+
+
+class PickClock:
+    """One timer heap for every league's pick clock.
+
+    Each league has at most one live deadline, for its current pick index. Entries
+    that are replaced or cancelled are left in the heap and skipped when popped,
+    so scheduling stays O(log n) and a single task serves any number of leagues.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str, int]] = []
+        self._live: Dict[str, Tuple[float, int]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Keep references to running expiries so they are not garbage collected
+        self._expiring: Set[asyncio.Task] = set()
+
+    def schedule(self, league_name: str, pick_index: int, deadline: Optional[datetime]) -> None:
+        if deadline is None:
+            self.cancel(league_name)
+            return
+        at = _timestamp(deadline)
+        self._live[league_name] = (at, pick_index)
+        heapq.heappush(self._heap, (at, league_name, pick_index))
+        # Only an earlier deadline than the one being waited on needs to wake the loop
+        if self._heap[0][1] == league_name and self._heap[0][0] == at:
+            self._wakeup.set()
+
+    def cancel(self, league_name: str) -> None:
+        self._live.pop(league_name, None)
+
+    async def rebuild(self) -> None:
+        # Restore every running clock from draft_config, e.g. after a restart
+        cursor = config_col().find(
+            {"draft_started": True, "pick_deadline": {"$ne": None}},
+            {"league_name": 1, "current_pick_index": 1, "pick_deadline": 1},
+        )
+        async for cfg in cursor:
+            self.schedule(cfg["league_name"], cfg.get("current_pick_index", 0), cfg["pick_deadline"])
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = datetime.now(timezone.utc).timestamp()
+            while self._heap and self._heap[0][0] <= now:
+                at, league_name, pick_index = heapq.heappop(self._heap)
+                if self._live.get(league_name) != (at, pick_index):
+                    continue  # superseded or cancelled
+                del self._live[league_name]
+                task = asyncio.create_task(self._expire(league_name, pick_index))
+                self._expiring.add(task)
+                task.add_done_callback(self._expiring.discard)
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _expire(self, league_name: str, pick_index: int) -> None:
+        try:
+            cfg = await get_config_doc(league_name)
+            if not cfg or not cfg.get("draft_started") or cfg.get("current_pick_index", 0) != pick_index:
+                return  # someone picked (or the draft was reconfigured) in the meantime
+            deadline = cfg.get("pick_deadline")
+            if deadline is None:
+                return
+            if _timestamp(deadline) > datetime.now(timezone.utc).timestamp():
+                self.schedule(league_name, pick_index, deadline)
+                return
+            team_name = snake_team(cfg.get("draft_order", []), pick_index)
+            if team_name is None:
+                return
+            next_deadline = next_pick_deadline(cfg, pick_index + 1)
+            player = await autodraft(cfg, team_name, next_deadline)
+            if player is None:
+                # Nothing rosterable is left for this team; stop the clock rather than spin
+                await config_col().update_one(
+                    {"_id": cfg["_id"], "current_pick_index": pick_index},
+                    {"$set": {"pick_deadline": None}},
+                )
+                logger.warning("Autodraft found no eligible player for %s in %s", team_name, league_name)
+                return
+            self.schedule(league_name, pick_index + 1, next_deadline)
+            await events.notify(
+                league_name,
+                "pick",
+                team_name=team_name,
+                player_id=str(player["_id"]),
+                current_pick_index=pick_index + 1,
+                pick_deadline=next_deadline,
+                auto=True,
+            )
+        except HTTPException as exc:
+            # Lost a race with a manual pick or another worker's clock
+            logger.info("Autodraft skipped for %s pick %s: %s", league_name, pick_index, exc.detail)
+        except Exception:
+            logger.exception("Autodraft failed for %s pick %s", league_name, pick_index)
+
+
+pick_clock = PickClock()
@@ -29,11 +29,17 @@ class PlayerOut(BaseModel):
     position: str
     drafted_by: Optional[str] = None
     rank: Optional[int] = None
+    # Optional projected points from the upload, and value over replacement derived from them
+    projection: Optional[float] = None
+    vor: Optional[float] = None
+    value_rank: Optional[int] = None
 
 
 class DraftConfigIn(BaseModel):
     position_limits: Dict[str, int]
     draft_order: List[str]
+    # Optional pick clock; when it runs out the team on the clock is auto-drafted
+    pick_seconds: Optional[int] = Field(None, ge=10)
 
 
 class DraftStateOut(BaseModel):
@@ -42,12 +48,18 @@ class DraftStateOut(BaseModel):
     current_pick_index: int
     current_team: Optional[str]
     draft_started: bool = False
+    pick_seconds: Optional[int] = None
+    pick_deadline: Optional[datetime] = None
 
 
 class DraftPickIn(BaseModel):
     player_id: str
 
 
+class DraftQueueIn(BaseModel):
+    player_ids: List[str]
+
+
 class TeamRosterOut(BaseModel):
     team_name: str
     players: List[PlayerOut]
@@ -60,3 +72,43 @@ class DraftedPlayerOut(BaseModel):
     position: str
     drafted_by: str
     drafted_at: Optional[datetime] = None
+    overall: Optional[int] = None
+    round: Optional[int] = None
+    auto: bool = False
+
+
+class DraftSnapshotOut(BaseModel):
+    version: int
+    state: DraftStateOut
+    my_team: TeamRosterOut
+    available: List[PlayerOut]
+    recent_picks: List[DraftedPlayerOut]
+    teams: List[str]
+
+
+class SimulateIn(BaseModel):
+    simulations: int = Field(1000, ge=100, le=20000)
+    # Spread of opponents' picks around the rankings, as a fraction of rank
+    noise: float = Field(0.2, ge=0, le=1)
+    players_per_pick: int = Field(25, ge=1, le=100)
+    seed: Optional[int] = None
+
+
+class PlayerOddsOut(BaseModel):
+    id: str
+    name: str
+    position: str
+    rank: Optional[int] = None
+    probability: float
+
+
+class SimulatedPickOut(BaseModel):
+    overall: int
+    round: int
+    players: List[PlayerOddsOut]
+
+
+class SimulationOut(BaseModel):
+    simulations: int
+    team_name: str
+    picks: List[SimulatedPickOut]
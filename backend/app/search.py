@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from .names import normalize_name
+
+# Typeahead over one league's available pool, held in memory next to the pool cache.
+#
+# Every prefix of every normalized name word maps to the players having it, and
+# every trigram of the whole normalized name to the players containing it. Posting
+# lists hold positions in the pool, which is already in rank order, so walking a
+# list front to back yields matches best-ranked first and a query stops after
+# `limit` hits instead of scoring the whole pool.
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    def __init__(self, players: List[Dict]):
+        self._players = players
+        self._keys: List[str] = []
+        self._words: List[List[str]] = []
+        self._removed: Set[str] = set()
+        prefixes: Dict[str, List[int]] = defaultdict(list)
+        trigrams: Dict[str, List[int]] = defaultdict(list)
+        for i, player in enumerate(players):
+            key = normalize_name(player.get("name") or "")
+            words = key.split()
+            self._keys.append(key)
+            self._words.append(words)
+            for prefix in {w[:n] for w in words for n in range(1, len(w) + 1)}:
+                prefixes[prefix].append(i)
+            for gram in _trigrams(key):
+                trigrams[gram].append(i)
+        self._prefixes = dict(prefixes)
+        self._trigrams = dict(trigrams)
+
+    def remove(self, player_id: str) -> None:
+        """Drop a drafted player without rebuilding."""
+        self._removed.add(player_id)
+
+    def _live(self, i: int, position: Optional[str]) -> bool:
+        player = self._players[i]
+        return player["id"] not in self._removed and (not position or player["position"] == position)
+
+    def search(self, query: str, limit: int = 10, position: Optional[str] = None) -> List[Dict]:
+        """Best-ranked available players whose name matches `query`.
+
+        Names where every query term starts a word ("pat mah" -> Patrick Mahomes) come
+        first; if those run short, names merely containing the query follow.
+        """
+        terms = normalize_name(query).split()
+        if not terms:
+            return []
+        found: List[int] = []
+        seen: Set[int] = set()
+
+        postings = [self._prefixes.get(term, []) for term in terms]
+        for i in min(postings, key=len):
+            if len(found) >= limit:
+                break
+            words = self._words[i]
+            if self._live(i, position) and all(any(w.startswith(t) for w in words) for t in terms):
+                found.append(i)
+                seen.add(i)
+
+        needle = " ".join(terms)
+        grams = _trigrams(needle)
+        if len(found) < limit and grams:
+            candidates = min((self._trigrams.get(g, []) for g in grams), key=len)
+            for i in candidates:
+                if len(found) >= limit:
+                    break
+                if i not in seen and needle in self._keys[i] and self._live(i, position):
+                    found.append(i)
+        return [self._players[i] for i in found]
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from .metrics import COALESCED_READS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers asking for the same key.
+
+    When a pick lands every client in the league refetches the same reads within a
+    few milliseconds. The first caller for a key runs the query; everyone arriving
+    while it is still running awaits the same result (or exception) instead of
+    issuing their own. Nothing is kept once the call finishes; caching is left to
+    the callers.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            COALESCED_READS.inc(str(key[0]) if isinstance(key, tuple) else str(key))
+        # Shielded so one caller disconnecting does not cancel the others' query
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        """Let the next caller for `key` start a fresh call; current waiters keep theirs."""
+        self._inflight.pop(key, None)
+
+    def _finished(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+# League reads: keys are tuples whose first element names the kind of read
+reads = SingleFlight()
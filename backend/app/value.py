@@ -0,0 +1,162 @@
+"""Value over replacement (VOR) rankings from uploaded projections.
+
+A player's VOR is their projection minus that of the best player at their position
+who would not be a starter: each position gets `teams x cap` starter slots, and the
+ANY slots go to the best remaining players of any position. Everything is computed
+with NumPy over the whole pool at once.
+
+Two rankings use it:
+  * `vor` / `value_rank` stored on each player, computed for empty rosters whenever
+    players are uploaded or the draft is configured;
+  * a live ranking of the available pool, recomputed after each pick from the slots
+    teams still have to fill, served by /players/available?sort=value.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+from .db import config_col, players_col
+from .rules import any_slots_used, parse_limit
+
+WRITE_BATCH_SIZE = 1000
+
+
+def _projection(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class ValueModel:
+    """Projections and position codes of a pool, in pool order."""
+
+    def __init__(self, projections: np.ndarray, positions: np.ndarray, names: List[str]):
+        self.projections = projections
+        self.positions = positions
+        self.names = names
+
+    @classmethod
+    def from_players(cls, players: Sequence[Dict]) -> "ValueModel":
+        names = sorted({p["position"] for p in players})
+        index = {name: i for i, name in enumerate(names)}
+        projections = np.array([_projection(p.get("projection")) for p in players], dtype=np.float64)
+        positions = np.array([index[p["position"]] for p in players], dtype=np.int64)
+        return cls(projections, positions, names)
+
+    def without(self, i: int) -> "ValueModel":
+        # After a pick: drop one row instead of rebuilding from the player dicts
+        return ValueModel(np.delete(self.projections, i), np.delete(self.positions, i), self.names)
+
+    def slots(self, limits: Dict[str, int], team_counts: Sequence[Dict[str, int]]) -> Tuple[np.ndarray, int]:
+        """Starter slots still open per position across teams, and open ANY slots."""
+        caps = np.array([parse_limit(limits.get(name)) or 0 for name in self.names], dtype=np.int64)
+        counts = np.array([[c.get(name, 0) for name in self.names] for c in team_counts], dtype=np.int64).reshape(
+            len(team_counts), len(self.names)
+        )
+        starters = np.maximum(caps[None, :] - counts, 0).sum(axis=0)
+        any_limit = parse_limit(limits.get("ANY")) or 0
+        flex = sum(max(any_limit - any_slots_used(c, limits), 0) for c in team_counts)
+        return starters, flex
+
+    def vor(self, starters: np.ndarray, flex: int) -> np.ndarray:
+        return value_over_replacement(self.projections, self.positions, starters, flex)
+
+
+def value_over_replacement(projections: np.ndarray, positions: np.ndarray, starters: np.ndarray, flex: int) -> np.ndarray:
+    """VOR for each player; NaN where the projection is missing.
+
+    `starters[q]` is the number of starter slots for position code q and `flex` the
+    number of slots open to any position.
+    """
+    n_positions = len(starters)
+    vor = np.full(projections.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(projections))
+    if valid.size == 0:
+        return vor
+    proj, pos = projections[valid], positions[valid]
+
+    # Depth at position: 0 for the best projection at each position
+    order = np.lexsort((-proj, pos))
+    per_position = np.bincount(pos, minlength=n_positions)
+    group_start = np.cumsum(per_position) - per_position
+    depth = np.empty(valid.size, dtype=np.int64)
+    depth[order] = np.arange(valid.size) - group_start[pos[order]]
+
+    starter = depth < starters[pos]
+    if flex > 0:
+        bench = np.flatnonzero(~starter)
+        if bench.size:
+            take = min(flex, bench.size)
+            best = bench[np.argpartition(-proj[bench], take - 1)[:take]]
+            starter[best] = True
+
+    # Replacement level: the best non-starter at each position (0 if every player starts)
+    filled = np.bincount(pos[starter], minlength=n_positions)
+    replacement = np.zeros(n_positions)
+    first_bench = np.flatnonzero(depth == filled[pos])
+    replacement[pos[first_bench]] = proj[first_bench]
+
+    vor[valid] = proj - replacement[pos]
+    return vor
+
+
+def rank_order(vor: np.ndarray) -> np.ndarray:
+    """Indices by descending VOR; players without one keep their pool order, last."""
+    keys = np.where(np.isnan(vor), np.inf, -vor)
+    return np.argsort(keys, kind="stable")
+
+
+def replacement_settings(cfg: Optional[Dict]) -> Tuple[int, Dict]:
+    """The parts of a draft config that VOR depends on: team count and position caps."""
+    cfg = cfg or {}
+    return len(cfg.get("draft_order") or []), cfg.get("position_limits") or {}
+
+
+async def store_value_ranks(league_name: str) -> int:
+    """Compute draft-start VOR for every player in the league and store `vor` and `value_rank`.
+
+    Does nothing until the draft is configured. Only players whose stored values
+    change are written. Returns the number of players ranked.
+    """
+    cfg = await config_col().find_one({"_id": f"config:{league_name}"})
+    if not cfg or not cfg.get("draft_order"):
+        return 0
+    col = players_col()
+    if not await col.find_one({"league_name": league_name, "projection": {"$ne": None}}, {"_id": 1}):
+        # No projections uploaded: nothing to rank, only stale values to clear
+        await col.update_many(
+            {"league_name": league_name, "vor": {"$ne": None}}, {"$set": {"vor": None, "value_rank": None}}
+        )
+        return 0
+    players = [
+        doc
+        async for doc in col.find(
+            {"league_name": league_name}, {"position": 1, "projection": 1, "vor": 1, "value_rank": 1}
+        )
+    ]
+    model = ValueModel.from_players(players)
+    empty_rosters: List[Dict[str, int]] = [{} for _ in cfg["draft_order"]]
+    vor = model.vor(*model.slots(cfg.get("position_limits", {}) or {}, empty_rosters))
+
+    ranks: List[Optional[int]] = [None] * len(players)
+    ranked = 0
+    for i in rank_order(vor):
+        if np.isnan(vor[i]):
+            break
+        ranked += 1
+        ranks[i] = ranked
+
+    ops: List[UpdateOne] = []
+    for player, value, rank in zip(players, vor, ranks):
+        value = None if np.isnan(value) else round(float(value), 2)
+        if player.get("vor") == value and player.get("value_rank") == rank:
+            continue
+        ops.append(UpdateOne({"_id": player["_id"]}, {"$set": {"vor": value, "value_rank": rank}}))
+        if len(ops) >= WRITE_BATCH_SIZE:
+            await col.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await col.bulk_write(ops, ordered=False)
+    return ranked
@@ -0,0 +1,50 @@
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from .db import leagues_col
+from .singleflight import reads
+
+# Every league carries a monotonically increasing version on its `leagues` document.
+# It is bumped after each pick, config change, draft start, upload and team join, so
+# readers can tell whether anything changed without scanning the players collection.
+
+
+async def version_doc(league_name: str) -> Dict[str, Any]:
+    """The league's version, last event and archive state (with when a restored league was last read)."""
+    # Every poll starts here, so concurrent readers of one league share the round trip
+    async def fetch():
+        return await leagues_col().find_one({"_id": league_name}, {"version": 1, "last_event": 1, "archive_state": 1, "last_read_at": 1}) or {}
+
+    return await reads.do(("version", league_name), fetch)
+
+
+async def get_version(league_name: str) -> int:
+    doc = await version_doc(league_name)
+    return int(doc.get("version", 0) or 0)
+
+
+async def bump_version(league_name: str, event: Optional[Dict[str, Any]] = None) -> int:
+    # The event that caused the bump is stored alongside it so a change stream on
+    # `leagues` can replay it to other workers (see changefeed.py)
+    update: Dict[str, Any] = {"$inc": {"version": 1}}
+    if event is not None:
+        update["$set"] = {"last_event": event}
+    doc = await leagues_col().find_one_and_update(
+        {"_id": league_name},
+        update,
+        projection={"version": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return int((doc or {}).get("version", 0) or 0)
+
+
+async def get_archive_state(league_name: str) -> Optional[str]:
+    """The league's archive state (see archive.py), read with its version."""
+    return (await version_doc(league_name)).get("archive_state")
+
+
+async def get_version_event(league_name: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """The league version and the event stored with its latest bump."""
+    doc = await version_doc(league_name)
+    return int(doc.get("version", 0) or 0), doc.get("last_event")
@@ -0,0 +1,286 @@
+"""Draft-night load test for the API.
+
+Creates N leagues x M teams, uploads a player CSV, then runs every league's snake
+draft to completion while each team polls the way the draft page does. Latency is
+recorded per route and written as JSON so runs can be compared across commits.
+
+By default the app is driven in-process (httpx ASGITransport) against the MongoDB
+at MONGO_URL, using a throwaway database. Point --base-url at a running server to
+measure it over the network instead.
+
+    pip install -r backend/requirements-dev.txt
+    python -m backend.bench.draft_load --leagues 4 --teams 12
+    python -m backend.bench.draft_load --compare bench_results/<earlier>.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_CSV = os.path.join(REPO_ROOT, "2025.csv")
+DEFAULT_LIMITS = {"QB": 2, "RB": 4, "WR": 5, "TE": 2, "K": 1, "DEF": 1}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, route: str, token: Optional[str] = None, **kwargs) -> httpx.Response:
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        label = f"{method} {route}"
+        started = time.perf_counter()
+        res = await client.request(method, route, headers=headers, **kwargs)
+        self.samples[label].append((time.perf_counter() - started) * 1000)
+        if res.status_code >= 500:
+            self.errors[label] += 1
+        return res
+
+
+def _percentile(sorted_ms: List[float], pct: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_ms:
+        return 0.0
+    k = max(0, min(len(sorted_ms) - 1, math.ceil(pct / 100 * len(sorted_ms)) - 1))
+    return sorted_ms[k]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, float]]:
+    routes = {}
+    for label, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        routes[label] = {
+            "count": len(ordered),
+            "errors": recorder.errors.get(label, 0),
+            "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(_percentile(ordered, 50), 3),
+            "p95_ms": round(_percentile(ordered, 95), 3),
+            "p99_ms": round(_percentile(ordered, 99), 3),
+            "max_ms": round(ordered[-1], 3),
+        }
+    return routes
+
+
+async def _setup_league(client, rec: Recorder, league: str, teams: int, csv_bytes: bytes, limits: Dict[str, int]) -> Dict[str, str]:
+    password = "bench-password"
+    names = [f"team{i:02d}" for i in range(teams)]
+    res = await rec.request(client, "POST", "/auth/create_league", json={"league_name": league, "league_password": password, "team_name": names[0]})
+    res.raise_for_status()
+    tokens = {names[0]: res.json()["access_token"]}
+    for name in names[1:]:
+        res = await rec.request(client, "POST", "/auth/login", json={"league_name": league, "league_password": password, "team_name": name})
+        res.raise_for_status()
+        tokens[name] = res.json()["access_token"]
+    admin = tokens[names[0]]
+    res = await rec.request(client, "POST", "/players/upload", admin, params={"mode": "overwrite"}, files={"file": ("players.csv", csv_bytes, "text/csv")})
+    res.raise_for_status()
+    res = await rec.request(client, "POST", "/draft/config", admin, json={"position_limits": limits, "draft_order": names})
+    res.raise_for_status()
+    res = await rec.request(client, "POST", "/draft/start", admin)
+    res.raise_for_status()
+    return tokens
+
+
+async def _poll(client, rec: Recorder, token: str, mode: str, interval: float, done: asyncio.Event) -> None:
+    etag = None
+    while not done.is_set():
+        if mode == "snapshot":
+            headers = {"If-None-Match": etag} if etag else {}
+            res = await rec.request(client, "GET", "/draft/snapshot", token, headers=headers, params={"picks_limit": 10})
+            etag = res.headers.get("etag", etag)
+        else:
+            # The five GETs the draft page used to issue on every poll
+            await asyncio.gather(
+                rec.request(client, "GET", "/draft/state", token),
+                rec.request(client, "GET", "/teams/me", token),
+                rec.request(client, "GET", "/players/available", token),
+                rec.request(client, "GET", "/players/drafted", token, params={"limit": 10}),
+                rec.request(client, "GET", "/teams/list", token),
+            )
+        try:
+            await asyncio.wait_for(done.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _draft(client, rec: Recorder, tokens: Dict[str, str], total_picks: int, think_time: float) -> int:
+    any_token = next(iter(tokens.values()))
+    made = 0
+    while made < total_picks:
+        state = (await rec.request(client, "GET", "/draft/state", any_token)).json()
+        team = state.get("current_team")
+        if team is None:
+            break
+        token = tokens[team]
+        # Only positions the team can still roster, so a board sorted by position
+        # never hides every eligible player below the first page
+        page = await rec.request(client, "GET", "/players/available", token, params={"limit": 50, "eligible_only": "true"})
+        picked = False
+        for player in page.json():
+            res = await rec.request(client, "POST", "/draft/pick", token, json={"player_id": player["id"]})
+            if res.status_code == 200:
+                picked = True
+                break
+            if res.status_code not in (400, 409):
+                res.raise_for_status()
+        if not picked:
+            # Nothing left the team can roster; run() reports the draft as incomplete
+            break
+        made += 1
+        if think_time:
+            await asyncio.sleep(think_time)
+    return made
+
+
+async def run(args) -> Dict:
+    with open(args.csv, "rb") as f:
+        csv_bytes = f.read()
+    limits = json.loads(args.limits) if args.limits else DEFAULT_LIMITS
+    rounds = args.rounds or sum(limits.values())
+    run_id = uuid.uuid4().hex[:8]
+    rec = Recorder()
+
+    async def drive(client):
+        leagues = [f"bench-{run_id}-{i}" for i in range(args.leagues)]
+        setups = await asyncio.gather(*[_setup_league(client, rec, league, args.teams, csv_bytes, limits) for league in leagues])
+        setup_samples = dict(rec.samples)
+        rec.samples.clear()
+
+        done = asyncio.Event()
+        pollers = [
+            asyncio.create_task(_poll(client, rec, token, args.poll_mode, args.poll_interval, done))
+            for tokens in setups
+            for token in tokens.values()
+            for _ in range(args.pollers_per_team)
+        ]
+        started = time.perf_counter()
+        picks = await asyncio.gather(*[_draft(client, rec, tokens, rounds * args.teams, args.think_time) for tokens in setups])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*pollers)
+        return leagues, picks, elapsed, setup_samples
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            leagues, picks, elapsed, setup_samples = await drive(client)
+    else:
+        # Import late so DB_NAME can point the app at a scratch database first
+        os.environ["DB_NAME"] = args.db_name
+        from backend.app.db import get_client
+        from backend.app.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                leagues, picks, elapsed, setup_samples = await drive(client)
+            if not args.keep_db:
+                await get_client().drop_database(args.db_name)
+
+    return {
+        "run_id": run_id,
+        "commit": _git_commit(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "params": {
+            "leagues": args.leagues,
+            "teams": args.teams,
+            "rounds": rounds,
+            "poll_mode": args.poll_mode,
+            "poll_interval": args.poll_interval,
+            "pollers_per_team": args.pollers_per_team,
+            "think_time": args.think_time,
+            "target": args.base_url or "in-process",
+        },
+        "picks_made": sum(picks),
+        "picks_expected": rounds * args.teams * args.leagues,
+        "incomplete_leagues": sum(1 for made in picks if made < rounds * args.teams),
+        "elapsed_s": round(elapsed, 3),
+        "picks_per_s": round(sum(picks) / elapsed, 2) if elapsed else 0.0,
+        "routes": summarize(rec, elapsed),
+        "setup_requests": {label: len(samples) for label, samples in setup_samples.items()},
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: Dict, baseline: Optional[Dict] = None) -> None:
+    print(f"commit {result['commit']}  picks {result['picks_made']} in {result['elapsed_s']}s ({result['picks_per_s']} picks/s)")
+    if result["incomplete_leagues"]:
+        print(
+            f"WARNING: {result['incomplete_leagues']} league(s) stopped early; "
+            f"{result['picks_made']} of {result['picks_expected']} picks made"
+        )
+    header = f"{'route':32} {'count':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    base_routes = (baseline or {}).get("routes", {})
+    for label, stats in result["routes"].items():
+        line = f"{label:32} {stats['count']:>7} {stats['throughput_rps']:>8} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        base = base_routes.get(label)
+        if baseline:
+            if base and base["p95_ms"]:
+                line += f" {(stats['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100:>+11.1f}%"
+            else:
+                line += f" {'new':>12}"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leagues", type=int, default=2)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=0, help="default: sum of position limits")
+    parser.add_argument("--limits", help='position limits JSON, default %s' % json.dumps(DEFAULT_LIMITS))
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--poll-mode", choices=["snapshot", "legacy"], default="snapshot")
+    parser.add_argument("--poll-interval", type=float, default=3.0)
+    parser.add_argument("--pollers-per-team", type=int, default=1)
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between picks")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--db-name", default="fantasy_draft_bench")
+    parser.add_argument("--keep-db", action="store_true")
+    parser.add_argument("--out", help="result JSON path (default bench_results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result JSON to compare p95 latencies against")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    out = args.out or os.path.join(
+        REPO_ROOT,
+        "bench_results",
+        f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{result['commit'] or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    print(f"wrote {out}")
+    # Latencies from a draft that stopped early are not comparable to a full run
+    return 1 if result["incomplete_leagues"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
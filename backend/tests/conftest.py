@@ -0,0 +1,40 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from backend.app import db
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def mongo():
+    # In-memory stand-in for the shared Motor client; every test starts from an empty database
+    db._client = AsyncMongoMockClient()
+    yield db.get_db()
+    db._client = None
+
+
+@pytest.fixture
+def client(mongo):
+    # The app without its lifespan, signed in as the admin of "test-league"
+    import asyncio
+
+    from fastapi.testclient import TestClient
+
+    from backend.app.auth import Principal, get_principal
+    from backend.app.main import app
+    from backend.app.pool import pool_cache
+
+    async def create_league():
+        await mongo["leagues"].insert_one({"_id": "test-league", "version": 0})
+        await mongo["teams"].insert_one({"team_name": "admin", "league_name": "test-league", "is_admin": True})
+
+    asyncio.run(create_league())
+    app.dependency_overrides[get_principal] = lambda: Principal("admin", "test-league", True)
+    pool_cache.invalidate("test-league")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    pool_cache.invalidate("test-league")
@@ -0,0 +1,109 @@
+import asyncio
+
+from backend.app.db import leagues_col
+
+
+def _set_archive_state(state):
+    asyncio.run(leagues_col().update_one({"_id": "test-league"}, {"$set": {"archive_state": state}}))
+
+
+def test_writes_to_archived_league_are_rejected(client):
+    _set_archive_state("restored")
+
+    res = client.post("/draft/config", json={"position_limits": {"QB": 1}, "draft_order": ["admin"]})
+    assert res.status_code == 409
+    res = client.post("/players/upload", files={"file": ("p.csv", b"name,position\nA,QB\n", "text/csv")})
+    assert res.status_code == 409
+
+
+def _league():
+    return asyncio.run(leagues_col().find_one({"_id": "test-league"}))
+
+
+def _archive_with_players(client):
+    from backend.app.archive import archive_league
+
+    client.post("/players/upload", files={"file": ("p.csv", b"name,position\nA,QB\nB,RB\n", "text/csv")})
+    client.post("/draft/config", json={"position_limits": {"QB": 1, "RB": 1}, "draft_order": ["admin"]})
+    asyncio.run(archive_league("test-league"))
+    assert _league()["archive_state"] == "archived"
+
+
+def test_failed_restore_goes_back_to_archived(client, monkeypatch):
+    from backend.app import archive
+
+    _archive_with_players(client)
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(archive, "config_col", lambda: type("Col", (), {"replace_one": broken})())
+    try:
+        asyncio.run(archive.restore_league("test-league"))
+    except RuntimeError:
+        pass
+    assert _league()["archive_state"] == "archived"
+
+    monkeypatch.undo()
+    assert asyncio.run(archive.restore_league("test-league"))
+    assert _league()["archive_state"] == "restored"
+
+
+def test_stale_restore_claim_is_taken_over(client):
+    from datetime import datetime, timedelta, timezone
+
+    from backend.app import archive
+
+    _archive_with_players(client)
+    claimed = datetime.now(timezone.utc)
+    asyncio.run(
+        leagues_col().update_one({"_id": "test-league"}, {"$set": {"archive_state": "restoring", "restoring_at": claimed}})
+    )
+    # A live claim is left alone
+    assert not asyncio.run(archive.restore_league("test-league"))
+
+    expired = claimed - timedelta(seconds=archive.ARCHIVE_RESTORE_TIMEOUT_S + 1)
+    asyncio.run(leagues_col().update_one({"_id": "test-league"}, {"$set": {"restoring_at": expired}}))
+    assert asyncio.run(archive.restore_league("test-league"))
+    assert _league()["archive_state"] == "restored"
+
+
+def test_reads_restore_an_archived_league(client):
+    _archive_with_players(client)
+
+    state = client.get("/draft/state").json()
+    assert state["draft_order"] == ["admin"]
+    assert _league()["archive_state"] == "restored"
+
+    assert sorted(p["name"] for p in client.get("/players/available").json()) == ["A", "B"]
+    assert client.get("/teams/me").status_code == 200
+
+
+def test_paged_and_pooled_reads_restore(client):
+    from backend.app.archive import archive_league
+
+    _archive_with_players(client)
+    res = client.get("/players/available", params={"limit": 10})
+    assert sorted(p["name"] for p in res.json()) == ["A", "B"]
+
+    # Archived again once idle; the pooled read restores it too
+    asyncio.run(archive_league("test-league"))
+    assert _league()["archive_state"] == "archived"
+    assert sorted(p["name"] for p in client.get("/players/available").json()) == ["A", "B"]
+
+
+def test_read_league_is_not_archived_again(client):
+    from datetime import datetime, timedelta, timezone
+
+    from backend.app import archive
+
+    _archive_with_players(client)
+    client.get("/draft/state")
+    # Restored long ago, last read just now: kept
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=archive.ARCHIVE_RESTORE_HOURS + 1)
+    asyncio.run(leagues_col().update_one({"_id": "test-league"}, {"$set": {"restored_at": long_ago, "last_read_at": long_ago}}))
+    client.get("/draft/state")
+    assert asyncio.run(archive.archive_completed_leagues(dry_run=True)) == []
+
+    asyncio.run(leagues_col().update_one({"_id": "test-league"}, {"$set": {"last_read_at": long_ago}}))
+    assert asyncio.run(archive.archive_completed_leagues(dry_run=True)) == ["test-league"]
@@ -0,0 +1,29 @@
+import pytest
+
+from backend.app.changefeed import ChangeFeed
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_workers_sharing_an_id_lease_separate_slots(mongo):
+    first, second = ChangeFeed("host"), ChangeFeed("host")
+    first._slot, _ = await first._claim_slot()
+    second._slot, _ = await second._claim_slot()
+    assert {first._slot, second._slot} == {"host:0", "host:1"}
+
+    await first._save_token({"_data": "first"})
+    await second._save_token({"_data": "second"})
+    await first.stop()
+
+    # A restarted worker takes over the released slot and resumes from its token
+    restarted = ChangeFeed("host")
+    assert await restarted._claim_slot() == ("host:0", {"_data": "first"})
+
+
+async def test_live_lease_is_not_taken_over(mongo):
+    live = ChangeFeed("host")
+    live._slot, _ = await live._claim_slot()
+    await live._save_token({"_data": "live"})
+
+    slot, token = await ChangeFeed("host")._claim_slot()
+    assert (slot, token) == ("host:1", None)
@@ -0,0 +1,28 @@
+import pytest
+
+from backend.app import encoding
+
+
+def _upload(client, n=200):
+    body = b"name,position\n" + b"".join(f"Player {i},QB\n".encode() for i in range(n))
+    assert client.post("/players/upload", files={"file": ("p.csv", body, "text/csv")}).status_code == 200
+
+
+def test_columns_format(client):
+    _upload(client, 3)
+    data = client.get("/players/available", params={"format": "columns"}).json()
+    assert data["name"] == ["Player 0", "Player 1", "Player 2"]
+    assert data["rank"] == [1, 2, 3]
+    assert set(data) == set(encoding.PLAYER_FIELDS)
+
+
+@pytest.mark.skipif(encoding.msgpack is not None, reason="msgpack is installed")
+def test_msgpack_without_package_is_406(client):
+    assert client.get("/players/available", params={"format": "msgpack"}).status_code == 406
+
+
+def test_large_pool_is_compressed(client):
+    _upload(client)
+    res = client.get("/players/available", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] in ("gzip", "br")
+    assert len(res.json()) == 200
@@ -0,0 +1,61 @@
+import pytest
+
+from backend.app.db import players_col
+from backend.app.routers.players import _merge_players, _player_doc, _UploadReport
+
+LEAGUE = "test-league"
+
+pytestmark = pytest.mark.anyio
+
+
+async def _rows(rows, before=None):
+    # The upload's parsed batches; `before` runs once the existing players have been read
+    if before is not None:
+        await before()
+    yield [(line, name, position, projection) for line, (name, position, projection) in enumerate(rows, 2)]
+
+
+async def _seed(*players):
+    docs = [_player_doc(LEAGUE, name, "QB", rank) for rank, name in enumerate(players, 1)]
+    await players_col().insert_many(docs)
+
+
+async def _players():
+    return {doc["name"]: doc async for doc in players_col().find({"league_name": LEAGUE})}
+
+
+async def test_merge_diff(mongo):
+    await _seed("Kept", "Moved", "Gone", "Drafted")
+    await players_col().update_one({"name": "Drafted"}, {"$set": {"drafted_by": "A"}})
+
+    rows = [("Moved", "QB", None), ("Kept", "QB", None), ("New", "QB", 250.0)]
+    counts = await _merge_players(LEAGUE, _rows(rows), 500, _UploadReport())
+
+    assert counts == {"inserted": 1, "updated": 2, "removed": 1, "unchanged": 0}
+    players = await _players()
+    assert set(players) == {"Kept", "Moved", "New", "Drafted"}
+    assert [players[n]["rank"] for n in ("Moved", "Kept", "New")] == [1, 2, 3]
+    assert players["New"]["projection"] == 250.0
+    assert players["Drafted"]["drafted_by"] == "A"
+
+
+async def test_merge_unchanged_writes_nothing(mongo):
+    await _seed("A", "B")
+    report = _UploadReport()
+
+    counts = await _merge_players(LEAGUE, _rows([("A", "QB", None), ("B", "QB", None)]), 500, report)
+
+    assert counts == {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 2}
+    assert report.changed is False
+
+
+async def test_merge_keeps_player_drafted_during_upload(mongo):
+    await _seed("A", "Picked")
+
+    async def pick():
+        await players_col().update_one({"name": "Picked"}, {"$set": {"drafted_by": "B"}})
+
+    counts = await _merge_players(LEAGUE, _rows([("A", "QB", None)], before=pick), 500, _UploadReport())
+
+    assert counts["removed"] == 0
+    assert (await _players())["Picked"]["drafted_by"] == "B"
@@ -0,0 +1,19 @@
+from backend.app.metrics import REQUEST_LATENCY, route_label
+
+
+class _Route:
+    path_format = "/by_name/{target_team}"
+
+
+def test_route_label_keeps_router_prefix():
+    assert route_label({"route": _Route(), "root_path": "/teams"}) == "/teams/by_name/{target_team}"
+    assert route_label({}) == "unmatched"
+
+
+def test_requests_are_labelled_by_full_template(client):
+    client.get("/teams/by_name/someone")
+    client.get("/players/available")
+
+    routes = {labels[1] for labels in REQUEST_LATENCY._series}
+    assert {"/teams/by_name/{target_team}", "/players/available"} <= routes
+    assert "/available" not in routes
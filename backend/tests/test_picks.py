@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app import picks
+from backend.app.db import config_col, picks_col, players_col, teams_col
+
+LEAGUE = "test-league"
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def league(mongo):
+    cfg = {
+        "_id": f"config:{LEAGUE}",
+        "league_name": LEAGUE,
+        "draft_order": ["A", "B"],
+        "position_limits": {"QB": 1, "RB": 2},
+        "current_pick_index": 0,
+        "draft_started": True,
+        "pick_deadline": None,
+    }
+    await config_col().insert_one(cfg)
+    await teams_col().insert_many(
+        [{"team_name": t, "league_name": LEAGUE, "position_counts": {}, "pick_count": 0} for t in ("A", "B")]
+    )
+    result = await players_col().insert_many(
+        [
+            {"name": name, "position": position, "rank": rank, "drafted_by": None, "league_name": LEAGUE}
+            for rank, (name, position) in enumerate([("Q1", "QB"), ("Q2", "QB"), ("R1", "RB")], start=1)
+        ]
+    )
+    return cfg, [str(oid) for oid in result.inserted_ids]
+
+
+async def _team(name):
+    return await teams_col().find_one({"team_name": name, "league_name": LEAGUE})
+
+
+async def _pick_index():
+    return (await config_col().find_one({"_id": f"config:{LEAGUE}"}))["current_pick_index"]
+
+
+async def test_commit_pick_updates_every_document(league):
+    cfg, ids = league
+    player = await picks.commit_pick(cfg, "A", ids[0])
+
+    assert player["drafted_by"] == "A"
+    assert await _pick_index() == 1
+    team = await _team("A")
+    assert team["pick_count"] == 1 and team["position_counts"] == {"QB": 1}
+    log = await picks_col().find({"league_name": LEAGUE}).to_list(None)
+    assert [(e["overall"], e["team_name"], e["player_name"]) for e in log] == [(1, "A", "Q1")]
+
+
+async def test_concurrent_duplicate_pick_commits_once(league):
+    cfg, ids = league
+    results = await asyncio.gather(
+        picks.commit_pick(cfg, "A", ids[0]), picks.commit_pick(cfg, "A", ids[0]), return_exceptions=True
+    )
+
+    errors = [r for r in results if isinstance(r, HTTPException)]
+    assert len(errors) == 1 and errors[0].status_code in (400, 409)
+    assert await _pick_index() == 1
+    assert (await _team("A"))["pick_count"] == 1
+    assert await picks_col().count_documents({"league_name": LEAGUE}) == 1
+
+
+async def test_concurrent_picks_of_one_player_by_two_teams(league):
+    cfg, ids = league
+    results = await asyncio.gather(
+        picks.commit_pick(cfg, "A", ids[0]), picks.commit_pick(cfg, "B", ids[0]), return_exceptions=True
+    )
+
+    winners = [r for r in results if not isinstance(r, Exception)]
+    assert len(winners) == 1
+    loser = "B" if winners[0]["drafted_by"] == "A" else "A"
+    # The losing team's counter claim was released
+    assert (await _team(loser))["pick_count"] == 0
+    assert (await _team(loser))["position_counts"].get("QB", 0) == 0
+    assert await _pick_index() == 1
+
+
+async def test_lost_team_claim_changes_nothing(league, monkeypatch):
+    cfg, ids = league
+    real_counts = picks.team_position_counts
+
+    async def stale_counts(league_name, team_name):
+        # Another pick by the same team lands between the read and the claim
+        counts, pick_count = await real_counts(league_name, team_name)
+        await teams_col().update_one({"team_name": team_name, "league_name": league_name}, {"$inc": {"pick_count": 1}})
+        return counts, pick_count
+
+    monkeypatch.setattr(picks, "team_position_counts", stale_counts)
+    with pytest.raises(HTTPException) as exc:
+        await picks.commit_pick(cfg, "A", ids[0])
+
+    assert exc.value.status_code == 409
+    assert await _pick_index() == 0
+    assert (await players_col().find_one({"name": "Q1"}))["drafted_by"] is None
+    assert await picks_col().count_documents({}) == 0
+
+
+async def test_lost_slot_releases_team_claim(league):
+    cfg, ids = league
+    # The slot was filled since this config was read
+    await config_col().update_one({"_id": cfg["_id"]}, {"$set": {"current_pick_index": 1}})
+
+    with pytest.raises(HTTPException) as exc:
+        await picks.commit_pick(cfg, "A", ids[0])
+
+    assert exc.value.status_code == 409
+    team = await _team("A")
+    assert team["pick_count"] == 0 and team["position_counts"].get("QB", 0) == 0
+    assert await _pick_index() == 1
+    assert (await players_col().find_one({"name": "Q1"}))["drafted_by"] is None
+
+
+async def test_lost_player_rolls_back_slot_and_team(league, monkeypatch):
+    cfg, ids = league
+    real_config_col = picks.config_col
+
+    class DraftedUnderUs:
+        # Lets the slot advance, then has another team draft the player before step 3
+        def __init__(self, col):
+            self._col = col
+
+        def __getattr__(self, name):
+            return getattr(self._col, name)
+
+        async def update_one(self, *args, **kwargs):
+            result = await self._col.update_one(*args, **kwargs)
+            await players_col().update_one({"name": "Q1"}, {"$set": {"drafted_by": "B"}})
+            return result
+
+    monkeypatch.setattr(picks, "config_col", lambda: DraftedUnderUs(real_config_col()))
+    with pytest.raises(HTTPException) as exc:
+        await picks.commit_pick(cfg, "A", ids[0])
+
+    assert exc.value.status_code == 400
+    assert await _pick_index() == 0
+    team = await _team("A")
+    assert team["pick_count"] == 0 and team["position_counts"].get("QB", 0) == 0
+    assert (await players_col().find_one({"name": "Q1"}))["drafted_by"] == "B"
+    assert await picks_col().count_documents({}) == 0
+
+
+async def test_roster_limit_rejected(league):
+    cfg, ids = league
+    await picks.commit_pick(cfg, "A", ids[0])
+    cfg = {**cfg, "current_pick_index": 1}
+
+    with pytest.raises(HTTPException) as exc:
+        await picks.commit_pick(cfg, "A", ids[1])
+
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Roster limit reached for QB"
+    assert await _pick_index() == 1
+    assert (await _team("A"))["position_counts"] == {"QB": 1}
+    assert (await players_col().find_one({"name": "Q2"}))["drafted_by"] is None
+
+
+def test_no_pick_clock_after_the_final_pick():
+    # Two teams with three roster slots each: picks 0-5
+    cfg = {"draft_order": ["A", "B"], "position_limits": {"QB": 1, "RB": 2}, "draft_started": True, "pick_seconds": 30}
+    assert picks.next_pick_deadline(cfg, 5) is not None
+    assert picks.next_pick_deadline(cfg, 6) is None
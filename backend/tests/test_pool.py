@@ -0,0 +1,50 @@
+def _upload(client, rows, mode="overwrite"):
+    body = "name,position,projection\n" + "".join(f"{name},{position},{points}\n" for name, position, points in rows)
+    res = client.post("/players/upload", params={"mode": mode}, files={"file": ("p.csv", body.encode(), "text/csv")})
+    assert res.status_code == 200, res.text
+
+
+def _since(client, version, **params):
+    return client.get("/players/available", params={"since": version, **params}).json()
+
+
+def _version(client):
+    return int(client.get("/players/available").headers["x-pool-version"])
+
+
+def test_since_after_merge_is_full(client):
+    _upload(client, [("A", "QB", 300), ("B", "QB", 200), ("C", "QB", 100)])
+    version = _version(client)
+
+    _upload(client, [("C", "QB", 100), ("B", "QB", 200), ("A", "QB", 300)], mode="merge")
+    changes = _since(client, version)
+
+    assert changes["full"] is True
+    assert [p["name"] for p in changes["added"]] == ["C", "B", "A"]
+    assert [p["rank"] for p in changes["added"]] == [1, 2, 3]
+
+
+def test_since_after_config_is_full(client):
+    _upload(client, [("A", "QB", 300), ("B", "QB", 200), ("C", "RB", 100)])
+    version = _version(client)
+
+    res = client.post("/draft/config", json={"position_limits": {"QB": 1, "RB": 1}, "draft_order": ["admin", "other"]})
+    assert res.status_code == 200
+    changes = _since(client, version)
+
+    assert changes["full"] is True
+    assert all(p["vor"] is not None for p in changes["added"])
+
+
+def test_since_after_pick_is_a_diff(client):
+    _upload(client, [("A", "QB", 300), ("B", "QB", 200)])
+    client.post("/draft/config", json={"position_limits": {"QB": 2}, "draft_order": ["admin"]})
+    client.post("/draft/start")
+    players = client.get("/players/available").json()
+    version = _version(client)
+
+    assert client.post("/draft/pick", json={"player_id": players[0]["id"]}).status_code == 200
+    changes = _since(client, version)
+
+    assert changes == {"version": version + 1, "full": False, "removed": [players[0]["id"]], "added": []}
+    assert _since(client, version, eligible_only="true")["full"] is True
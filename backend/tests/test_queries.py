@@ -0,0 +1,19 @@
+import pytest
+
+from backend.app.db import migrations_col, players_col
+from backend.app.queries import UNRANKED, backfill_sort_rank
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_backfill_sort_rank_runs_once(mongo):
+    await players_col().insert_many([{"name": "A", "rank": 3}, {"name": "B", "rank": None}])
+
+    assert await backfill_sort_rank() == 2
+    assert {p["name"]: p["sort_rank"] async for p in players_col().find()} == {"A": 3, "B": UNRANKED}
+    assert await migrations_col().find_one({"_id": "backfill_sort_rank"})
+
+    # Later starts skip the scan
+    await players_col().insert_one({"name": "C", "rank": 1})
+    assert await backfill_sort_rank() == 0
+    assert "sort_rank" not in await players_col().find_one({"name": "C"})
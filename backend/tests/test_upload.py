@@ -0,0 +1,57 @@
+import asyncio
+
+from backend.app.db import players_col
+
+CSV_HEADER = b"name,position\n"
+
+
+def _csv(names, position="QB"):
+    return CSV_HEADER + b"".join(f"{n},{position}\n".encode() for n in names)
+
+
+def _upload(client, body, **params):
+    return client.post("/players/upload", params=params, files={"file": ("players.csv", body, "text/csv")})
+
+
+def _available(client):
+    res = client.get("/players/available")
+    assert res.status_code == 200
+    return res.headers["X-Pool-Version"], sorted(p["name"] for p in res.json())
+
+
+def test_overwrite_with_malformed_tail_keeps_league(client):
+    assert _upload(client, _csv(["Old 1", "Old 2"])).status_code == 200
+    version, names = _available(client)
+    assert names == ["Old 1", "Old 2"]
+
+    # Many valid batches, then bytes that are not UTF-8 past the header's read buffer
+    body = _csv([f"New {i}" for i in range(2000)]) + b"Bad \xff\xfe,QB\n"
+    res = _upload(client, body, batch_size=100)
+
+    assert res.status_code == 400
+    assert _available(client) == (version, ["Old 1", "Old 2"])
+    # Nothing staged is left behind
+    assert asyncio.run(players_col().count_documents({})) == 2
+
+
+def test_overwrite_with_no_valid_rows_keeps_league(client):
+    _upload(client, _csv(["Old 1"]))
+    res = _upload(client, CSV_HEADER + b",QB\n")
+
+    assert res.status_code == 400
+    assert _available(client)[1] == ["Old 1"]
+
+
+def test_partial_append_is_published(client):
+    _upload(client, _csv(["Old 1"]))
+    version, _ = _available(client)
+
+    new = [f"New {i}" for i in range(2000)]
+    res = _upload(client, _csv(new) + b"Bad \xff,QB\n", mode="append", batch_size=100)
+
+    assert res.status_code == 400
+    assert "already saved" in res.json()["detail"]
+    new_version, names = _available(client)
+    assert new_version != version
+    assert "Old 1" in names and len(names) > 1
+
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from backend.app import value
+from backend.app.db import config_col, players_col
+
+LEAGUE = "test-league"
+
+pytestmark = pytest.mark.anyio
+
+
+def test_value_over_replacement():
+    projections = np.array([300.0, 250.0, 200.0, 150.0, 100.0, np.nan])
+    positions = np.array([0, 0, 0, 1, 1, 1])
+    # One starter per position plus one flex: QB 300 and RB 150 start, flex takes QB 250
+    vor = value.value_over_replacement(projections, positions, np.array([1, 1]), 1)
+    assert vor[:5].tolist() == [100.0, 50.0, 0.0, 50.0, 0.0]
+    assert np.isnan(vor[5])
+    assert value.rank_order(vor).tolist() == [0, 1, 3, 2, 4, 5]
+
+
+class _CountingPlayers:
+    def __init__(self):
+        self.col = players_col()
+        self.writes = 0
+
+    def __getattr__(self, name):
+        return getattr(self.col, name)
+
+    async def bulk_write(self, ops, **kwargs):
+        self.writes += len(ops)
+        return await self.col.bulk_write(ops, **kwargs)
+
+
+@pytest.fixture
+async def configured(mongo, monkeypatch):
+    await config_col().insert_one(
+        {"_id": f"config:{LEAGUE}", "league_name": LEAGUE, "draft_order": ["A", "B"], "position_limits": {"QB": 1}}
+    )
+    counting = _CountingPlayers()
+    monkeypatch.setattr(value, "players_col", lambda: counting)
+    return counting
+
+
+async def test_no_projections_writes_nothing(configured):
+    await players_col().insert_many([{"league_name": LEAGUE, "name": n, "position": "QB"} for n in "ABC"])
+
+    assert await value.store_value_ranks(LEAGUE) == 0
+    assert configured.writes == 0
+    assert await players_col().count_documents({"vor": {"$exists": True}}) == 0
+
+
+async def test_only_changed_ranks_are_written(configured):
+    await players_col().insert_many(
+        [{"league_name": LEAGUE, "name": n, "position": "QB", "projection": p} for n, p in (("A", 300), ("B", 200), ("C", 100))]
+    )
+
+    assert await value.store_value_ranks(LEAGUE) == 3
+    assert configured.writes == 3
+    assert [p["value_rank"] async for p in players_col().find().sort("name", 1)] == [1, 2, 3]
+
+    # Nothing changed: nothing written
+    assert await value.store_value_ranks(LEAGUE) == 3
+    assert configured.writes == 3
+
+    # One projection moves: only the players whose values moved are written
+    await players_col().update_one({"name": "C"}, {"$set": {"projection": 150}})
+    await value.store_value_ranks(LEAGUE)
+    assert configured.writes == 3 + 2
+
+
+def test_replacement_settings():
+    base = {"draft_order": ["A", "B"], "position_limits": {"QB": 1}}
+    assert value.replacement_settings(base) == value.replacement_settings({**base, "pick_seconds": 60})
+    assert value.replacement_settings(base) != value.replacement_settings({**base, "draft_order": ["A", "B", "C"]})
+    assert value.replacement_settings(None) == (0, {})
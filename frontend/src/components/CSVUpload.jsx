@@ -3,7 +3,7 @@ import api from '../api'
 
 export default function CSVUpload({ onUploaded }) {
   const [file, setFile] = useState(null)
-  const [overwrite, setOverwrite] = useState(true)
+  const [mode, setMode] = useState('overwrite')
   const [loading, setLoading] = useState(false)
 
   const upload = async () => {
@@ -12,7 +12,7 @@ export default function CSVUpload({ onUploaded }) {
     try {
       const form = new FormData()
       form.append('file', file)
-      await api.post(`/players/upload?overwrite=${overwrite}`, form, { headers: { 'Content-Type': 'multipart/form-data' } })
+      await api.post(`/players/upload?mode=${mode}`, form, { headers: { 'Content-Type': 'multipart/form-data' } })
       onUploaded?.()
       setFile(null)
     } catch (err) {
@@ -27,7 +27,12 @@ export default function CSVUpload({ onUploaded }) {
       <h4>Upload Players CSV</h4>
       <input type="file" accept=".csv" onChange={e => setFile(e.target.files?.[0] || null)} />
       <label style={{ marginTop: 8 }}>
-        <input type="checkbox" checked={overwrite} onChange={e => setOverwrite(e.target.checked)} /> Overwrite existing
+        Mode:{' '}
+        <select value={mode} onChange={e => setMode(e.target.value)}>
+          <option value="overwrite">Overwrite existing</option>
+          <option value="merge">Merge (update ranks, keep picks)</option>
+          <option value="append">Append</option>
+        </select>
       </label>
       <button disabled={!file || loading} onClick={upload}>Upload</button>
     </div>
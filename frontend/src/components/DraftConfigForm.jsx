@@ -1,12 +1,14 @@
 import React, { useEffect, useMemo, useState } from 'react'
 import api from '../api'
 
-export default function DraftConfigForm({ onSaved, positionLimits, draftOrder, currentPickIndex }) {
+export default function DraftConfigForm({ onSaved, positionLimits, draftOrder, currentPickIndex, pickSeconds }) {
   const defaultLimits = '{"QB":1,"RB":2,"WR":2,"TE":1,"FLEX":1}'
   const [limits, setLimits] = useState(() => (positionLimits ? JSON.stringify(positionLimits) : defaultLimits))
   const [order, setOrder] = useState(() => (draftOrder && draftOrder.length ? draftOrder.join(',') : ''))
   const [dirtyLimits, setDirtyLimits] = useState(false)
   const [dirtyOrder, setDirtyOrder] = useState(false)
+  const [clock, setClock] = useState(() => (pickSeconds ? String(pickSeconds) : ''))
+  const [dirtyClock, setDirtyClock] = useState(false)
 
   // Keep form in sync with server state unless user has started editing
   useEffect(() => {
@@ -15,6 +17,9 @@ export default function DraftConfigForm({ onSaved, positionLimits, draftOrder, c
   useEffect(() => {
     if (!dirtyOrder) setOrder(draftOrder && draftOrder.length ? draftOrder.join(',') : '')
   }, [draftOrder, dirtyOrder])
+  useEffect(() => {
+    if (!dirtyClock) setClock(pickSeconds ? String(pickSeconds) : '')
+  }, [pickSeconds, dirtyClock])
 
   const [loading, setLoading] = useState(false)
 
@@ -23,10 +28,12 @@ export default function DraftConfigForm({ onSaved, positionLimits, draftOrder, c
     try {
       const position_limits = JSON.parse(limits)
       const draft_order = order.split(',').map(s => s.trim()).filter(Boolean)
-      await api.post('/draft/config', { position_limits, draft_order })
+      const pick_seconds = clock.trim() ? Number(clock) : null
+      await api.post('/draft/config', { position_limits, draft_order, pick_seconds })
       onSaved?.()
       setDirtyLimits(false)
       setDirtyOrder(false)
+      setDirtyClock(false)
     } catch (err) {
       alert(err.response?.data?.detail || 'Failed to save config (ensure JSON is valid)')
     } finally {
@@ -80,6 +87,8 @@ export default function DraftConfigForm({ onSaved, positionLimits, draftOrder, c
       <textarea rows={4} value={limits} onChange={e => { setLimits(e.target.value); setDirtyLimits(true) }} />
       <label>Draft Order (comma separated team names)</label>
       <input value={order} onChange={e => { setOrder(e.target.value); setDirtyOrder(true) }} />
+      <label>Pick clock (seconds, blank for none; expired picks are auto-drafted)</label>
+      <input type="number" min="10" value={clock} onChange={e => { setClock(e.target.value); setDirtyClock(true) }} />
       <button onClick={save} disabled={loading}>Save</button>
       <div style={{ marginTop: 12 }}>
         <strong>Upcoming (saved):</strong>
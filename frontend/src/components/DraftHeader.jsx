@@ -1,7 +1,18 @@
-import React from 'react'
+import React, { useEffect, useState } from 'react'
 
 export default function DraftHeader({ draftState, onRefresh }) {
   const current = draftState?.current_team || '—'
+  const deadline = draftState?.pick_deadline ? new Date(draftState.pick_deadline).getTime() : null
+  const [now, setNow] = useState(Date.now())
+  useEffect(() => {
+    if (!deadline) return
+    const id = setInterval(() => setNow(Date.now()), 1000)
+    return () => clearInterval(id)
+  }, [deadline])
+  const renderClock = () => {
+    const left = Math.max(0, Math.round((deadline - now) / 1000))
+    return `${Math.floor(left / 60)}:${String(left % 60).padStart(2, '0')}`
+  }
   const renderOrder = () => {
     const order = draftState?.draft_order || []
     const idx = draftState?.current_pick_index ?? 0
@@ -14,7 +25,7 @@ export default function DraftHeader({ draftState, onRefresh }) {
   return (
     <div className="card">
       <div className="row">
-        <h3>On the clock: {current}</h3>
+        <h3>On the clock: {current}{deadline ? ` (${renderClock()})` : ''}</h3>
         <button onClick={onRefresh}>Refresh</button>
       </div>
       {draftState && (
@@ -1,6 +1,7 @@
 import React from 'react'
 
 export default function PlayerTable({ players, onPick, disabled, loading }) {
+  const showValue = players.some(p => p.vor != null)
   return (
     <div className="card">
       <table>
@@ -9,6 +10,7 @@ export default function PlayerTable({ players, onPick, disabled, loading }) {
             <th>Rank</th>
             <th>Name</th>
             <th>Position</th>
+            {showValue && <th title="Projected points over replacement level">VOR</th>}
             <th></th>
           </tr>
         </thead>
@@ -18,13 +20,14 @@ export default function PlayerTable({ players, onPick, disabled, loading }) {
               <td>{p.rank ?? '—'}</td>
               <td>{p.name}</td>
               <td>{p.position}</td>
+              {showValue && <td>{p.vor ?? '—'}</td>}
               <td>
                 <button disabled={disabled || loading} onClick={() => onPick(p.id)}>Draft</button>
               </td>
             </tr>
           ))}
           {players.length === 0 && (
-            <tr><td colSpan="4" style={{ textAlign: 'center' }}>No players</td></tr>
+            <tr><td colSpan={showValue ? 5 : 4} style={{ textAlign: 'center' }}>No players</td></tr>
           )}
         </tbody>
       </table>
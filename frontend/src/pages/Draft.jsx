@@ -1,4 +1,4 @@
-import React, { useEffect, useMemo, useState } from 'react'
+import React, { useEffect, useMemo, useRef, useState } from 'react'
 import api from '../api'
 import DraftHeader from '../components/DraftHeader'
 import TeamRoster from '../components/TeamRoster'
@@ -16,6 +16,10 @@ export default function Draft({ onLogout }) {
   const [players, setPlayers] = useState([])
   const [recentPicks, setRecentPicks] = useState([])
   const [positionFilter, setPositionFilter] = useState('')
+  const [eligibleOnly, setEligibleOnly] = useState(false)
+  const [sortBy, setSortBy] = useState('rank')
+  const [searchQuery, setSearchQuery] = useState('')
+  const [searchResults, setSearchResults] = useState([])
   const [loading, setLoading] = useState(false)
   const [teams, setTeams] = useState([])
   const isMyTurn = useMemo(() => draftState?.current_team === teamName, [draftState, teamName])
@@ -36,24 +40,28 @@ export default function Draft({ onLogout }) {
     return upcoming
   }
 
+  // ETag of the last snapshot; the server answers 304 while the league is unchanged
+  const etagRef = useRef(null)
+
   const loadAll = async () => {
     setLoading(true)
     try {
-      const [stateRes, teamRes, playersRes, draftedRes, teamsRes] = await Promise.all([
-        api.get('/draft/state'),
-        api.get('/teams/me'),
-        api.get('/players/available', { params: { position: positionFilter || undefined } }),
-        api.get('/players/drafted', { params: { limit: 10 } }),
-        api.get('/teams/list'),
-      ])
-      setDraftState(stateRes.data)
-      setMyTeam(teamRes.data)
-      setPlayers(playersRes.data)
-      setRecentPicks(draftedRes.data)
-      setTeams(teamsRes.data || [])
+      const res = await api.get('/draft/snapshot', {
+        params: { position: positionFilter || undefined, picks_limit: 10, eligible_only: eligibleOnly || undefined, sort: sortBy },
+        headers: etagRef.current ? { 'If-None-Match': etagRef.current } : {},
+        validateStatus: (s) => (s >= 200 && s < 300) || s === 304,
+      })
+      if (res.status === 304) return
+      etagRef.current = res.headers.etag || null
+      const snap = res.data
+      setDraftState(snap.state)
+      setMyTeam(snap.my_team)
+      setPlayers(snap.available)
+      setRecentPicks(snap.recent_picks)
+      setTeams(snap.teams || [])
       // Load viewer roster based on current selection
       if (selectedTeam === teamName) {
-        setSelectedRoster(teamRes.data)
+        setSelectedRoster(snap.my_team)
       } else {
         try {
           const other = await api.get(`/teams/by_name/${encodeURIComponent(selectedTeam)}`)
@@ -68,20 +76,44 @@ export default function Draft({ onLogout }) {
     }
   }
 
-  useEffect(() => { loadAll(); const id = setInterval(loadAll, 3000); return () => clearInterval(id) }, [positionFilter])
+  // Keep a handle on the latest loadAll so long-lived listeners don't capture stale filters
+  const loadAllRef = useRef(loadAll)
+  loadAllRef.current = loadAll
+
+  useEffect(() => { loadAll() }, [positionFilter, eligibleOnly, sortBy])
+
+  // Refetch only when the server reports a change; slow poll as a safety net
+  useEffect(() => {
+    const token = localStorage.getItem('token')
+    const source = new EventSource(`${api.defaults.baseURL}/draft/events?token=${encodeURIComponent(token || '')}`)
+    const onChange = () => loadAllRef.current()
+    const types = ['pick', 'start', 'config', 'players', 'teams', 'undo', 'replay', 'archived', 'restored']
+    types.forEach((t) => source.addEventListener(t, onChange))
+    // After a dropped connection, catch up on anything missed while disconnected
+    let opened = false
+    source.onopen = () => { if (opened) onChange(); opened = true }
+    const id = setInterval(onChange, 30000)
+    return () => {
+      clearInterval(id)
+      types.forEach((t) => source.removeEventListener(t, onChange))
+      source.close()
+    }
+  }, [])
 
-  // Refetch available players when position filter changes
+  // Typeahead: server-side name search, re-run when the pool changes
   useEffect(() => {
-    const refetchPlayers = async () => {
+    const q = searchQuery.trim()
+    if (!q) return
+    const id = setTimeout(async () => {
       try {
-        const res = await api.get('/players/available', { params: { position: positionFilter || undefined } })
-        setPlayers(res.data)
-      } catch (e) {
-        // ignore
+        const res = await api.get('/players/search', { params: { q, limit: 25, position: positionFilter || undefined } })
+        setSearchResults(res.data)
+      } catch {
+        setSearchResults([])
       }
-    }
-    refetchPlayers()
-  }, [positionFilter])
+    }, 150)
+    return () => clearTimeout(id)
+  }, [searchQuery, positionFilter, players])
 
   // Refresh the viewer panel whenever selected team changes (without waiting for the next poll)
   useEffect(() => {
@@ -101,6 +133,21 @@ export default function Draft({ onLogout }) {
     run()
   }, [selectedTeam, teamName, myTeam])
 
+  const downloadExport = async (fmt) => {
+    // Fetched with the Authorization header rather than a ?token= link, which would leak into logs and history
+    try {
+      const res = await api.get('/draft/export', { params: { format: fmt }, responseType: 'blob' })
+      const url = URL.createObjectURL(res.data)
+      const link = document.createElement('a')
+      link.href = url
+      link.download = `draft.${fmt}`
+      link.click()
+      URL.revokeObjectURL(url)
+    } catch (err) {
+      alert(err.response?.status ? `Export failed (${err.response.status})` : 'Export failed')
+    }
+  }
+
   const handlePick = async (playerId) => {
     try {
       await api.post('/draft/pick', { player_id: playerId })
@@ -172,11 +219,22 @@ export default function Draft({ onLogout }) {
                   )}
                 </div>
               )}
+              {draftState?.draft_started && (
+                <div style={{ margin: '8px 0' }}>
+                  <button
+                    onClick={async () => { if (!window.confirm('Undo the most recent pick?')) return; try { await api.post('/draft/undo'); await loadAll() } catch (e) { alert(e.response?.data?.detail || 'Undo failed') } }}
+                    disabled={!draftState?.current_pick_index}
+                  >
+                    Undo Last Pick
+                  </button>
+                </div>
+              )}
               <DraftConfigForm
                 onSaved={loadAll}
                 positionLimits={draftState?.position_limits}
                 draftOrder={draftState?.draft_order}
                 currentPickIndex={draftState?.current_pick_index}
+                pickSeconds={draftState?.pick_seconds}
               />
             </div>
           )}
@@ -191,8 +249,23 @@ export default function Draft({ onLogout }) {
                 <option key={pos} value={pos}>{pos}</option>
               ))}
             </select>
+            <label style={{ marginLeft: 16 }}>
+              <input type="checkbox" checked={eligibleOnly} onChange={(e) => setEligibleOnly(e.target.checked)} /> Only players I can roster
+            </label>
+            <label style={{ marginLeft: 16, marginRight: 8 }}>Sort by:</label>
+            <select value={sortBy} onChange={(e) => setSortBy(e.target.value)}>
+              <option value="rank">Rank</option>
+              <option value="value">Value over replacement</option>
+            </select>
+          </div>
+          <div style={{ marginBottom: 8 }}>
+            <input
+              placeholder="Search players by name"
+              value={searchQuery}
+              onChange={(e) => setSearchQuery(e.target.value)}
+            />
           </div>
-          <PlayerTable players={players} onPick={handlePick} disabled={!isMyTurn} loading={loading} />
+          <PlayerTable players={searchQuery.trim() ? searchResults : players} onPick={handlePick} disabled={!isMyTurn} loading={loading} />
           <div className="card" style={{ marginTop: 16 }}>
             <h3>Upcoming Picks</h3>
             {draftState?.draft_order?.length ? (
@@ -207,6 +280,21 @@ export default function Draft({ onLogout }) {
           </div>
           <div className="card" style={{ marginTop: 16 }}>
             <h3>Recent Picks</h3>
+            {recentPicks.length > 0 && (
+              <p className="muted">
+                Export all picks:{' '}
+                {['csv', 'json'].map((fmt) => (
+                  <a
+                    key={fmt}
+                    style={{ marginRight: 8 }}
+                    href="#"
+                    onClick={(e) => { e.preventDefault(); downloadExport(fmt) }}
+                  >
+                    {fmt.toUpperCase()}
+                  </a>
+                ))}
+              </p>
+            )}
             {recentPicks.length === 0 ? (
               <p>No picks yet.</p>
             ) : (